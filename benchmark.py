@@ -0,0 +1,215 @@
+import argparse
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+
+import jeuClassique
+import jeuComplexe
+import jeuClassiqueBonus
+import jeuClassiqueBonusSecondDegre
+import jeuPowerUP
+from game import Game, game_constants
+from profiler import Profiler
+
+# Benchmark of the five variants, headless, with fixed seeds and fixed weights.
+#
+#   python benchmark.py --out benchmark.json
+#   python benchmark.py --out new.json --baseline benchmark.json
+#
+# Two policies per variant:
+# - short: weights at 0, the bird never jumps and the game lasts ~35 frames.
+#   Played by the run_game* function of the variant. Measures the cost of a
+#   game (setup, first frames): games/sec.
+# - long: weights trained for the variant, on a modified course whose
+#   difficulty stops at LONG_COURSE (saved in the meta of the report): the
+#   game lasts until the MAX_FRAMES cap (30 000) for the seeds of the
+#   benchmark. Measures frames/sec.
+# The scores are saved too: a change that should not modify the games can be
+# checked against the baseline.
+# Each case is played `repeat` times and the fastest pass is kept: the other
+# passes are slowed down by whatever else runs on the machine.
+# --phases: one more pass with a profiler.Profiler, to see which phase of the
+# frame (policy, physics, collision...) takes the time and which one changed.
+
+# At the full difficulty (gap 60, speed 10) some pipes follow each other too
+# far apart in height for any bird: no weights last until the cap. The long
+# games are played with the difficulty stopped at this gap and speed, the
+# weights below last the 30 000 frames on seeds 0 to 4.
+LONG_COURSE = {"PIPE_GAP_MIN": 170, "PIPE_SPEED_MAX": 3}
+
+VARIANTS = {
+    "jeuClassique": (jeuClassique.run_game, [-2.124, -1.896, 0.177, 1.0, 0.231]),
+    "jeuComplexe": (jeuComplexe.run_game_complexe, [1.641, -1.778, -1.474, 1.843, 2.717, 0.987, 2.02, 2.305, 0.038, 0.064, 0.146, 1.909, 1.392, 0.367, -0.701, 0.128]),
+    "jeuClassiqueBonus": (jeuClassiqueBonus.run_game_classique_bonus, [-0.743, -4.63, 0.687, 1.019, -0.556, -0.18, 0.198]),
+    "jeuClassiqueBonusSecondDegre": (jeuClassiqueBonusSecondDegre.run_game_classique_bonus, [4.619, -4.593, 0.188, -3.178, 0.079, -1.019, -1.38, -4.477, 8.55, 1.997, 2.158, 0.099, 0.239, -0.395]),
+    "jeuPowerUP": (jeuPowerUP.run_game_powerUP, ([-1.039, -2.444, 0.711, 2.576, -0.027, -0.096, 0.059], [0.299, -0.352, 1.141, 1.0, 0.215, 1.008, -1.355])),
+}
+
+
+def zero_weights(weights):
+    if isinstance(weights, tuple):
+        return tuple([0.0] * len(w) for w in weights)
+    return [0.0] * len(weights)
+
+
+# constants: the game is played on these constants (LONG_COURSE) instead of
+# those of the variant, with the Game and the policy run_game_function would use
+def play_game(run_game_function, weights, seed, max_frames, profiler=None, constants=None):
+    info = {}
+    if constants is not None:
+        variant = sys.modules[run_game_function.__module__]
+        policy = variant.make_policy(*weights) if isinstance(weights, tuple) else variant.make_policy(weights)
+        score = Game(constants, policy, seed, max_frames).run(info=info, profiler=profiler)
+    elif isinstance(weights, tuple):
+        score = run_game_function(*weights, seed=seed, max_frames=max_frames, info=info, profiler=profiler)
+    else:
+        score = run_game_function(weights, seed=seed, max_frames=max_frames, info=info, profiler=profiler)
+    # the frame counter is not incremented on the frame of the collision
+    frames = info["frames"] + (info["stop_reason"] == "collision")
+    return score, frames
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+def timed_pass(run_game_function, weights, games, max_frames, constants=None):
+    scores = []
+    latencies = []
+    total_frames = 0
+    start = time.perf_counter()
+    for seed in range(games):
+        t = time.perf_counter()
+        score, frames = play_game(run_game_function, weights, seed, max_frames, constants=constants)
+        latencies.append(time.perf_counter() - t)
+        scores.append(score)
+        total_frames += frames
+    return time.perf_counter() - start, total_frames, latencies, scores
+
+
+def bench_case(run_game_function, weights, games, max_frames, repeat, phases=False, constants=None):
+    # warm up (imports, caches) before timing
+    play_game(run_game_function, weights, 0, max_frames, constants=constants)
+
+    passes = [timed_pass(run_game_function, weights, games, max_frames, constants) for _ in range(repeat)]
+    elapsed, total_frames, latencies, scores = min(passes, key=lambda p: p[0])
+
+    # tracemalloc slows the game down: peak memory is measured on its own
+    tracemalloc.start()
+    play_game(run_game_function, weights, 0, max_frames, constants=constants)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {
+        "games": games,
+        "frames": total_frames,
+        "seconds": elapsed,
+        "frames_per_sec": total_frames / elapsed,
+        "games_per_sec": games / elapsed,
+        "latency_ms": {
+            "p50": percentile(latencies, 50) * 1000,
+            "p90": percentile(latencies, 90) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+            "max": max(latencies) * 1000,
+        },
+        "peak_memory_kb": peak / 1024,
+        "scores": scores,
+    }
+
+    if phases:
+        profiler = Profiler()
+        for seed in range(games):
+            play_game(run_game_function, weights, seed, max_frames, profiler, constants)
+        result["phases"] = profiler.report()
+    return result
+
+
+def run(variants, short_games, long_games, max_frames, repeat, phases=False):
+    results = {}
+    for name in variants:
+        run_game_function, weights = VARIANTS[name]
+        long_course = dict(game_constants(sys.modules[run_game_function.__module__]), **LONG_COURSE)
+        results[name] = {
+            "short": bench_case(run_game_function, zero_weights(weights), short_games, max_frames, repeat, phases),
+            "long": bench_case(run_game_function, weights, long_games, max_frames, repeat, phases, long_course),
+        }
+        for case, r in results[name].items():
+            print(f"{name:30} {case:5} {r['frames_per_sec']:10.0f} frames/s {r['games_per_sec']:9.1f} games/s "
+                  f"p50 {r['latency_ms']['p50']:8.2f} ms  p99 {r['latency_ms']['p99']:8.2f} ms  "
+                  f"peak {r['peak_memory_kb']:7.1f} kB", flush=True)
+            if "phases" in r:
+                print(" " * 37 + "  ".join(f"{phase} {p['us_per_call']:.2f} us {p['share']:.0%}" for phase, p in r["phases"].items()))
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "short_games": short_games,
+            "long_games": long_games,
+            "max_frames": max_frames,
+            # the long games are not played on the course of the variant
+            "long_course": LONG_COURSE,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+# Prints the change of each measure against the baseline and returns the
+# regressions: frames/sec or games/sec lower than the baseline by more than tolerance
+def compare(report, baseline, tolerance):
+    regressions = []
+    print(f"\nAgainst the baseline of {baseline['meta']['date']} (python {baseline['meta']['python']}):")
+    if baseline["meta"].get("long_course") != report["meta"]["long_course"]:
+        print("(the long games of the baseline were played on another course)")
+    for name, cases in report["results"].items():
+        for case, r in cases.items():
+            old = baseline["results"].get(name, {}).get(case)
+            if old is None:
+                continue
+            changes = []
+            for measure in ("frames_per_sec", "games_per_sec"):
+                change = r[measure] / old[measure] - 1
+                changes.append(f"{measure} {change:+7.1%}")
+                if change < -tolerance:
+                    regressions.append(f"{name} {case} {measure} {change:+.1%}")
+            p50 = r["latency_ms"]["p50"] / old["latency_ms"]["p50"] - 1
+            memory = r["peak_memory_kb"] / old["peak_memory_kb"] - 1
+            same = "same scores" if r["scores"] == old["scores"] else "SCORES CHANGED"
+            print(f"{name:30} {case:5} {'  '.join(changes)}  p50 {p50:+7.1%}  peak memory {memory:+7.1%}  {same}")
+            if "phases" in r and "phases" in old:
+                print(" " * 37 + "  ".join(f"{phase} {p['us_per_call'] / old['phases'][phase]['us_per_call'] - 1:+.1%}"
+                                            for phase, p in r["phases"].items() if phase in old["phases"]))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark of the game variants")
+    parser.add_argument("--out", default="benchmark.json", help="JSON file for the results")
+    parser.add_argument("--baseline", help="JSON file of a previous run to compare with")
+    parser.add_argument("--variants", nargs="+", choices=list(VARIANTS), default=list(VARIANTS))
+    parser.add_argument("--short-games", type=int, default=200)
+    parser.add_argument("--long-games", type=int, default=5)
+    parser.add_argument("--max-frames", type=int, default=30000)
+    parser.add_argument("--repeat", type=int, default=3, help="passes per case, the fastest one is kept")
+    parser.add_argument("--phases", action="store_true", help="also time the phases of the frames")
+    parser.add_argument("--tolerance", type=float, default=0.05, help="slowdown allowed before a regression is reported")
+    args = parser.parse_args()
+
+    report = run(args.variants, args.short_games, args.long_games, args.max_frames, args.repeat, args.phases)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print(" ", regression)
+            sys.exit(1)
@@ -0,0 +1,268 @@
+import importlib
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+import time
+from collections import deque
+
+from cache import variant_name
+from evaluation import Evaluator, GAME_MODULES, play
+
+# Games played by worker processes on other machines, over TCP.
+#
+#   broker = Broker(port=5555)            # in the notebook, a drop-in Evaluator
+#   python broker.py HOST 5555 [processes]  # on each machine
+#   hill_climb(run_game, 5, evaluator=broker, batch_size=100)
+#
+# Checked on localhost by check_broker.py.
+#
+# The protocol is JSON lines, one message per line:
+#   worker -> broker  {"type": "hello", "name": ..., "slots": 2}
+#                     {"type": "result", "id": 12, "score": 1234}
+#                     {"type": "error", "id": 12, "message": ...}
+#                     {"type": "heartbeat"}
+#   broker -> worker  {"type": "jobs", "jobs": [{"id", "variant", "weights", "pair", "seed", "max_frames"}]}
+# A worker pulls work with its slots: it is sent at most that many jobs,
+# and each result frees a slot. The variant is the module and name of the run
+# game function (cache.variant_name), pair: the weights are a tuple (jeuPowerUP).
+# The floats are written with repr: the weights arrive bit for bit and the
+# scores are those of the same games played locally.
+#
+# A worker that closes its connection, or sends nothing (not even a
+# heartbeat) for heartbeat_timeout seconds, is dropped and its jobs are sent
+# to the other workers.
+# A batch waits for workers as long as it needs to (a message is printed when
+# none is connected), or raises RuntimeError after timeout seconds if given.
+
+HEARTBEAT = 2.0
+
+
+class _Worker:
+    def __init__(self, sock):
+        self.sock = sock
+        self.name = None
+        self.slots = 0
+        self.jobs = set()
+
+
+class Broker(Evaluator):
+    def __init__(self, host="127.0.0.1", port=0, cache=None, heartbeat_timeout=10.0, timeout=None):
+        self.chunksize = None
+        self.cache = cache
+        self.heartbeat_timeout = heartbeat_timeout
+        self.timeout = timeout
+        self.condition = threading.Condition()
+        self.workers = []
+        self.jobs = {}
+        self.pending = deque()
+        self.results = {}
+        self.errors = []
+        self.next_id = 0
+        self.closed = False
+        self.server = socket.create_server((host, port))
+        self.address = self.server.getsockname()
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    # Games played at the same time: one per connected worker
+    @property
+    def max_workers(self):
+        return max(1, len(self.workers))
+
+    def wait_for_workers(self, n=1, timeout=None):
+        with self.condition:
+            self.condition.wait_for(lambda: len(self.workers) >= n, timeout)
+            return len(self.workers)
+
+    def _accept(self):
+        while True:
+            try:
+                sock, _ = self.server.accept()
+            except OSError:
+                return
+            sock.settimeout(self.heartbeat_timeout)
+            threading.Thread(target=self._serve, args=(_Worker(sock),), daemon=True).start()
+
+    def _serve(self, worker):
+        try:
+            for line in worker.sock.makefile("rb"):
+                message = json.loads(line)
+                with self.condition:
+                    self._receive(worker, message)
+                    self._dispatch()
+                    self.condition.notify_all()
+        except (OSError, ValueError):
+            pass
+        with self.condition:
+            self._drop(worker)
+
+    def _receive(self, worker, message):
+        kind = message["type"]
+        if kind == "hello":
+            worker.name = message["name"]
+            worker.slots = message["slots"]
+            self.workers.append(worker)
+        elif kind == "result":
+            worker.jobs.discard(message["id"])
+            worker.slots += 1
+            if self.jobs.pop(message["id"], None) is not None:
+                self.results[message["id"]] = message["score"]
+        elif kind == "error":
+            worker.jobs.discard(message["id"])
+            worker.slots += 1
+            if self.jobs.pop(message["id"], None) is not None:
+                self.errors.append(f"{worker.name}: {message['message']}")
+
+    # Sends the pending jobs to the workers with free slots
+    def _dispatch(self):
+        for worker in self.workers:
+            jobs = []
+            while self.pending and worker.slots > 0:
+                job_id = self.pending.popleft()
+                if job_id not in self.jobs:
+                    continue
+                jobs.append(self.jobs[job_id])
+                worker.jobs.add(job_id)
+                worker.slots -= 1
+            if jobs:
+                try:
+                    worker.sock.sendall(json.dumps({"type": "jobs", "jobs": jobs}).encode() + b"\n")
+                except OSError:
+                    # its thread drops it and gives its jobs back
+                    worker.slots = 0
+                    worker.sock.close()
+
+    def _drop(self, worker):
+        worker.sock.close()
+        if worker not in self.workers:
+            return
+        self.workers.remove(worker)
+        lost = [job_id for job_id in worker.jobs if job_id in self.jobs]
+        self.pending.extendleft(sorted(lost, reverse=True))
+        if lost and not self.closed:
+            print(f"Worker {worker.name} lost, {len(lost)} games sent again")
+        self._dispatch()
+        self.condition.notify_all()
+
+    def play_games(self, run_game_function, weights_list, seeds, max_frames):
+        variant = variant_name(run_game_function)
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("the broker is closed")
+            ids = list(range(self.next_id, self.next_id + len(weights_list)))
+            self.next_id += len(weights_list)
+            for job_id, weights, seed in zip(ids, weights_list, seeds):
+                self.jobs[job_id] = {"id": job_id, "variant": variant, "weights": weights, "pair": isinstance(weights, tuple),
+                                     "seed": seed, "max_frames": max_frames}
+            self.pending.extend(ids)
+            self._dispatch()
+            try:
+                self._wait(ids)
+            except BaseException:
+                # interrupted, failed or timed out: the games of the batch are dropped
+                for job_id in ids:
+                    self.jobs.pop(job_id, None)
+                    self.results.pop(job_id, None)
+                raise
+            return [self.results.pop(job_id) for job_id in ids]
+
+    def _wait(self, ids):
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        warned = False
+        while not all(job_id in self.results for job_id in ids):
+            if self.closed:
+                raise RuntimeError("the broker was closed before the games were played")
+            if self.errors:
+                errors, self.errors = self.errors, []
+                raise RuntimeError("games failed on the workers: " + "; ".join(errors))
+            if not self.workers and not warned:
+                host, port = self.address[:2]
+                print(f"No worker connected, {len(ids)} games waiting: python broker.py {host} {port}")
+                warned = True
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise RuntimeError(f"games not played after {self.timeout} s ({len(self.workers)} workers connected)")
+            self.condition.wait(remaining)
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.server.close()
+            self.condition.notify_all()
+            for worker in self.workers:
+                try:
+                    worker.sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+
+def _run_game_function(variant, functions):
+    if variant not in functions:
+        module, name = variant.rsplit(".", 1)
+        functions[variant] = getattr(importlib.import_module(module), name)
+    return functions[variant]
+
+
+# Connects to the broker (retrying until it is up) and plays the jobs it
+# sends until the broker closes the connection. slots: jobs held at once,
+# the next one is already there when a game ends.
+def run_worker(host, port, slots=2, heartbeat=HEARTBEAT, name=None, preload=GAME_MODULES):
+    for module in preload:
+        importlib.import_module(module)
+    while True:
+        try:
+            sock = socket.create_connection((host, port))
+            break
+        except ConnectionRefusedError:
+            time.sleep(1)
+
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            sock.sendall(json.dumps(message).encode() + b"\n")
+
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(heartbeat):
+            try:
+                send({"type": "heartbeat"})
+            except OSError:
+                return
+
+    send({"type": "hello", "name": name or f"{socket.gethostname()}:{os.getpid()}", "slots": slots})
+    threading.Thread(target=beat, daemon=True).start()
+    functions = {}
+    try:
+        for line in sock.makefile("rb"):
+            for job in json.loads(line)["jobs"]:
+                weights = tuple(job["weights"]) if job["pair"] else job["weights"]
+                try:
+                    score = play(_run_game_function(job["variant"], functions), weights, job["seed"], job["max_frames"])
+                except Exception as e:
+                    send({"type": "error", "id": job["id"], "message": repr(e)})
+                    continue
+                send({"type": "result", "id": job["id"], "score": score})
+    except OSError:
+        pass
+    finally:
+        stop.set()
+        sock.close()
+
+
+# python broker.py HOST PORT [processes]: one worker per process (default: one per core)
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("usage: python broker.py HOST PORT [processes]")
+        sys.exit(1)
+
+    host, port = sys.argv[1], int(sys.argv[2])
+    processes = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count()
+    workers = [multiprocessing.Process(target=run_worker, args=(host, port)) for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
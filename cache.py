@@ -0,0 +1,143 @@
+import hashlib
+import json
+import sqlite3
+import sys
+from collections import OrderedDict
+
+from evaluation import GAME_MODULES, play
+from game import ENGINE_VERSION, game_constants
+
+
+def variant_name(run_game_function):
+    return f"{run_game_function.__module__}.{run_game_function.__qualname__}"
+
+
+# The module of the function and the variants it is built on
+# (jeuClassiqueAnalytic plays jeuClassique)
+def _variant_modules(run_game_function):
+    module = sys.modules[run_game_function.__module__]
+    return [module] + [vars(module)[name] for name in GAME_MODULES if name in vars(module)]
+
+
+_game_keys = {}
+
+
+# Hash of the constants of the game played and of the engine version: a
+# score stored before GRAVITY, PIPE_GAP_INIT... changed is not found anymore.
+# The constants are read at each call, only their hash is remembered.
+def _game_key(modules):
+    constants = {}
+    for module in reversed(modules):
+        constants.update(game_constants(module))
+    items = tuple(sorted(constants.items()))
+    if items not in _game_keys:
+        text = json.dumps([ENGINE_VERSION, items])
+        _game_keys[items] = hashlib.sha1(text.encode()).hexdigest()[:16]
+    return _game_keys[items]
+
+
+def _weights_key(weights):
+    # run_game_powerUP: tuple of 2 weight sets
+    if isinstance(weights, tuple):
+        return [[float(w) for w in ws] for ws in weights]
+    return [float(w) for w in weights]
+
+
+# A seeded game always gives the same score, so it only has to be played once.
+# The scores are kept in memory (LRU, maxsize entries) and, if path is given,
+# in an SQLite file that can be shared between notebook sessions.
+# Only games with an int seed are cached: an unseeded game is random.
+class FitnessCache:
+    def __init__(self, maxsize=100_000, path=None):
+        self.maxsize = maxsize
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        self.db = None
+        if path is not None:
+            self.db = sqlite3.connect(path)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("CREATE TABLE IF NOT EXISTS scores (key TEXT PRIMARY KEY, score)")
+            self.db.commit()
+
+    # The part of the key shared by the games of a batch
+    @staticmethod
+    def game_key(run_game_function, max_frames):
+        modules = _variant_modules(run_game_function)
+        # max_frames=None is the frame cap of the game: same game, same key
+        if max_frames is None:
+            max_frames = modules[0].MAX_FRAMES
+        return variant_name(run_game_function), _game_key(modules), max_frames
+
+    # game: game_key() of the function, if already known
+    @staticmethod
+    def key(run_game_function, weights, seed, max_frames, game=None):
+        variant, constants, max_frames = game or FitnessCache.game_key(run_game_function, max_frames)
+        # repr of the floats (used by json) is exact, equal weights give equal keys
+        return json.dumps([variant, constants, _weights_key(weights), seed, max_frames])
+
+    @staticmethod
+    def cacheable(seed):
+        return isinstance(seed, int) and not isinstance(seed, bool)
+
+    def get(self, key):
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return self.memory[key]
+
+        if self.db is not None:
+            row = self.db.execute("SELECT score FROM scores WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._remember(key, row[0])
+                self.hits += 1
+                return row[0]
+
+        self.misses += 1
+        return None
+
+    def put(self, key, score):
+        self._remember(key, score)
+        if self.db is not None:
+            self.db.execute("INSERT OR REPLACE INTO scores VALUES (?, ?)", (key, score))
+            self.db.commit()
+
+    def put_many(self, items):
+        for key, score in items:
+            self._remember(key, score)
+        if self.db is not None:
+            self.db.executemany("INSERT OR REPLACE INTO scores VALUES (?, ?)", items)
+            self.db.commit()
+
+    def _remember(self, key, score):
+        self.memory[key] = score
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.maxsize:
+            self.memory.popitem(last=False)
+
+    def score(self, run_game_function, weights, seed=None, max_frames=None):
+        if not self.cacheable(seed):
+            return play(run_game_function, weights, seed, max_frames)
+
+        key = self.key(run_game_function, weights, seed, max_frames)
+        score = self.get(key)
+        if score is None:
+            score = play(run_game_function, weights, seed, max_frames)
+            self.put(key, score)
+        return score
+
+    # Same call as run_game_function(weights, seed=...), with the cache
+    def wrap(self, run_game_function, max_frames=None):
+        def cached_run_game(*weights, seed=None):
+            weights = weights[0] if len(weights) == 1 else weights
+            return self.score(run_game_function, weights, seed, max_frames)
+        return cached_run_game
+
+    def __len__(self):
+        return len(self.memory)
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
@@ -0,0 +1,51 @@
+import queue
+import threading
+
+import numpy as np
+
+
+# Writes the frames of a game to a video while it is played.
+# The frames go through a bounded queue to an encoder thread: the memory used
+# doesn't depend on the length of the game (at most max_queue frames), and if
+# the encoder is late the game waits for it.
+class VideoWriter:
+    def __init__(self, path, fps, max_queue=64):
+        import imageio
+        self.writer = imageio.get_writer(path, fps=fps)
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.error = None
+        self.thread = threading.Thread(target=self._encode, daemon=True)
+        self.thread.start()
+
+    def _encode(self):
+        try:
+            while True:
+                frame = self.queue.get()
+                if frame is None:
+                    break
+                self.writer.append_data(frame)
+        except Exception as e:
+            self.error = e
+            # keep emptying the queue so the game is not blocked
+            while self.queue.get() is not None:
+                pass
+        finally:
+            self.writer.close()
+
+    def add(self, surface):
+        import pygame
+        # The pixels come row by row, which is already the (height, width, 3)
+        # layout of a video frame: no surfarray copy + swapaxes needed
+        width, height = surface.get_size()
+        data = pygame.image.tobytes(surface, "RGB") if hasattr(pygame.image, "tobytes") else pygame.image.tostring(surface, "RGB")
+        self.queue.put(np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3))
+
+    # Can be called again (the window closed by the user closes the video
+    # before the game does)
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
@@ -0,0 +1,46 @@
+import random
+import time
+
+import jeuClassique
+from jeuClassiqueAnalytic import run_game_analytic
+
+# Check that jeuClassiqueAnalytic plays the same games as jeuClassique:
+#
+#   python check_analytic.py
+#
+# For random weights, weights around trained ones and degenerate weights
+# (zeros, halves, too few or too many weights), with the full frame cap or a
+# short one and with or without steady_pipes, run_game_analytic must give the
+# score and the info (stop reason, frames) of jeuClassique.run_game.
+
+TRAINED = [-2.124, -1.896, 0.177, 1.0, 0.231]
+
+
+def cases(rng):
+    weights = [[rng.uniform(-2, 2) for _ in range(5)] for _ in range(300)]
+    weights += [[w + rng.uniform(-0.3, 0.3) for w in TRAINED] for _ in range(40)]
+    weights += [[rng.choice([0, 0.5, -1, 1, 0.25]) for _ in range(5)] for _ in range(100)]
+    weights += [TRAINED[:k] for k in range(6)] + [TRAINED + [3.0]]
+    return [(w, rng.getrandbits(32)) for w in weights]
+
+
+if __name__ == "__main__":
+    rng = random.Random(5)
+    games = 0
+    seconds = {"run_game": 0.0, "analytic": 0.0}
+    for weights, seed in cases(rng):
+        for max_frames in (jeuClassique.MAX_FRAMES, 537):
+            for steady_pipes in (None, 5):
+                info, analytic_info = {}, {}
+                start = time.perf_counter()
+                score = jeuClassique.run_game(weights, seed=seed, max_frames=max_frames, steady_pipes=steady_pipes, info=info)
+                seconds["run_game"] += time.perf_counter() - start
+                start = time.perf_counter()
+                analytic_score = run_game_analytic(weights, seed=seed, max_frames=max_frames, steady_pipes=steady_pipes, info=analytic_info)
+                seconds["analytic"] += time.perf_counter() - start
+                assert (analytic_score, analytic_info) == (score, info), \
+                    f"weights {weights} seed {seed} max_frames {max_frames} steady_pipes {steady_pipes}: " \
+                    f"{analytic_score} {analytic_info} instead of {score} {info}"
+                games += 1
+    print(f"{games} games, same scores and info, run_game {seconds['run_game']:.1f} s, analytic {seconds['analytic']:.1f} s")
+    print("OK")
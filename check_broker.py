@@ -0,0 +1,128 @@
+import multiprocessing
+import os
+import random
+import signal
+import threading
+import time
+
+import jeuClassique
+import jeuComplexe
+import jeuPowerUP
+from broker import Broker, run_worker
+from evaluation import SerialEvaluator
+
+# Check of the broker with its workers on localhost:
+#
+#   python check_broker.py
+#
+# Batches of games of 3 variants are played by the broker, and the scores
+# must be those of the SerialEvaluator: with every worker up, after a worker
+# is killed in the middle of a batch, after one is frozen (SIGSTOP, it stops
+# sending heartbeats) and after a new worker joins. Then a game that fails on
+# a worker and a batch on a closed broker must raise RuntimeError.
+
+MAX_FRAMES = 3000
+GAMES = 60
+
+
+def start_worker(address):
+    process = multiprocessing.Process(target=run_worker, args=address, kwargs={"heartbeat": 0.3})
+    process.start()
+    return process
+
+
+# (run game function, weights, seed) of the games of a batch
+def make_batch(rng):
+    games = []
+    for i in range(GAMES):
+        if i % 3 == 0:
+            games.append((jeuClassique.run_game, [rng.uniform(-2, 2) for _ in range(5)]))
+        elif i % 3 == 1:
+            games.append((jeuPowerUP.run_game_powerUP, ([rng.uniform(-2, 2) for _ in range(7)], [rng.uniform(-2, 2) for _ in range(7)])))
+        else:
+            games.append((jeuComplexe.run_game_complexe, [rng.uniform(-2, 2) for _ in range(16)]))
+    return [(function, weights, rng.getrandbits(64)) for function, weights in games]
+
+
+# Scores of the batch, one evaluate() per variant
+def evaluate(evaluator, batch):
+    scores = [None] * len(batch)
+    for function in (jeuClassique.run_game, jeuPowerUP.run_game_powerUP, jeuComplexe.run_game_complexe):
+        indices = [i for i, (f, _, _) in enumerate(batch) if f is function]
+        played = evaluator.evaluate(function, [batch[i][1] for i in indices], seeds=[batch[i][2] for i in indices], max_frames=MAX_FRAMES)
+        for i, score in zip(indices, played):
+            scores[i] = score
+    return scores
+
+
+def wait_until(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+# action: called once the broker has results of the batch, while it runs
+def check(broker, rng, label, action=None):
+    batch = make_batch(rng)
+    expected = evaluate(SerialEvaluator(), batch)
+    done = threading.Event()
+    fired = threading.Event()
+
+    def act():
+        if wait_until(lambda: broker.results or done.is_set()) and not done.is_set():
+            action()
+            fired.set()
+
+    thread = threading.Thread(target=act, daemon=True)
+    if action is not None:
+        thread.start()
+    start = time.perf_counter()
+    scores = evaluate(broker, batch)
+    done.set()
+    if action is not None:
+        thread.join()
+        assert fired.is_set(), f"{label}: the batch ended before the worker was stopped"
+    assert scores == expected, f"{label}: the scores differ from the SerialEvaluator"
+    print(f"{label:10} {len(batch)} games, same scores, {time.perf_counter() - start:.2f} s, {len(broker.workers)} workers")
+
+
+if __name__ == "__main__":
+    rng = random.Random(1)
+    broker = Broker(port=0, heartbeat_timeout=1.5)
+    processes = [start_worker(broker.address) for _ in range(3)]
+    assert broker.wait_for_workers(3, timeout=30) == 3, "the workers didn't connect"
+
+    try:
+        check(broker, rng, "all up")
+        check(broker, rng, "killed", processes[0].terminate)
+        assert wait_until(lambda: len(broker.workers) == 2), "the killed worker is still there"
+        if hasattr(signal, "SIGSTOP"):
+            check(broker, rng, "frozen", lambda: os.kill(processes[1].pid, signal.SIGSTOP))
+            assert wait_until(lambda: len(broker.workers) == 1), "the frozen worker is still there"
+        processes.append(start_worker(broker.address))
+        broker.wait_for_workers(len(broker.workers) + 1, timeout=30)
+        check(broker, rng, "joined")
+
+        try:
+            broker.evaluate(jeuClassique.run_game, [[1, 2, "x", 4, 5]], seeds=[1])
+            raise AssertionError("a game that fails on a worker didn't raise")
+        except RuntimeError as e:
+            print(f"error      {e}")
+    finally:
+        broker.close()
+        if hasattr(signal, "SIGCONT"):
+            os.kill(processes[1].pid, signal.SIGCONT)
+        for process in processes:
+            process.join(10)
+            if process.is_alive():
+                process.terminate()
+
+    try:
+        broker.evaluate(jeuClassique.run_game, [[0.0] * 5], seeds=[1])
+        raise AssertionError("a closed broker played games")
+    except RuntimeError as e:
+        print(f"closed     {e}")
+    print("OK")
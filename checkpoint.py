@@ -0,0 +1,66 @@
+import json
+import os
+
+
+# Checkpoints of a training, appended to a file, one JSON line each:
+#
+#   {"config": {...}}                                   first line
+#   {"generation": 100, "state": {...}, "history": {...}}
+#   {"generation": 200, "state": {...}, "history": {...}}
+#
+# state is everything needed to go on (best weights, epsilon, state of the
+# random generator...), history holds only the generations played since the
+# previous checkpoint: a checkpoint costs the same at generation 100 and at
+# generation 50 000, and the file is never rewritten.
+# Each line is flushed to the disk before the training goes on. A line cut
+# by a crash is not valid JSON: it is ignored, and removed before the next
+# checkpoint is written.
+class Checkpoint:
+    def __init__(self, path, config):
+        # tuples and lists compare equal once written
+        self.config = json.loads(json.dumps(config))
+        self.path = path
+        self.valid_size = 0
+
+    # Returns (generation, state, history) of the last checkpoint, None if
+    # there is none yet. history: the histories of all the checkpoints, joined
+    def load(self):
+        if not os.path.exists(self.path):
+            return None
+
+        last = None
+        history = {}
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                if "config" in record:
+                    if record["config"] != self.config:
+                        raise ValueError(f"{self.path} is the checkpoint of another training: {record['config']}")
+                else:
+                    last = record
+                    for name, values in record["history"].items():
+                        history.setdefault(name, []).extend(values)
+                self.valid_size = f.tell()
+
+        if last is None:
+            return None
+        return last["generation"], last["state"], history
+
+    def _append(self, record):
+        with open(self.path, "ab") as f:
+            # drops what a crash may have left after the last valid line
+            f.truncate(self.valid_size)
+            f.write(json.dumps(record).encode() + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+            self.valid_size = f.tell()
+
+    def save(self, generation, state, history):
+        if self.valid_size == 0:
+            self._append({"config": self.config})
+        self._append({"generation": generation, "state": state, "history": history})
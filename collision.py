@@ -0,0 +1,36 @@
+# Collision tests without pygame.
+# A rect is a tuple (x, y, width, height). The coordinates are truncated to int
+# like pygame.Rect does, so the results are the same as with colliderect.
+
+
+def rect(x, y, width, height):
+    return int(x), int(y), int(width), int(height)
+
+
+def colliderect(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    return (aw > 0 and ah > 0 and bw > 0 and bh > 0 and
+            ax < bx + bw and bx < ax + aw and
+            ay < by + bh and by < ay + ah)
+
+
+# Top and bottom pipe against the bird rect, with plain comparisons.
+# The horizontal test comes first: most of the time the pipe is not
+# over the bird and the vertical tests are skipped.
+def hits_pipe(bird_rect, pipe_x, bottom_x, pipe_width, top_height, bottom_y, bottom_height):
+    bx, by, bw, bh = bird_rect
+
+    left = int(pipe_x)
+    if bx < left + pipe_width and left < bx + bw:
+        top_height = int(top_height)
+        if top_height > 0 and by < top_height and 0 < by + bh:
+            return True
+
+    left = int(bottom_x)
+    if bx < left + pipe_width and left < bx + bw:
+        bottom_y = int(bottom_y)
+        if by < bottom_y + bottom_height and bottom_y < by + bh:
+            return True
+
+    return False
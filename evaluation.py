@@ -0,0 +1,139 @@
+import importlib
+import multiprocessing
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+# Imported by the workers when they start, before the first game
+GAME_MODULES = ("jeuClassique", "jeuComplexe", "jeuClassiqueBonus", "jeuClassiqueBonusSecondDegre", "jeuPowerUP")
+
+
+# max_frames=None keeps the frame cap of the game (MAX_FRAMES)
+def play(run_game_function, weights, seed=None, max_frames=None):
+    kwargs = {"seed": seed}
+    if max_frames is not None:
+        kwargs["max_frames"] = max_frames
+    # run_game_powerUP takes 2 sets of weights, they are given as a tuple
+    if isinstance(weights, tuple):
+        return run_game_function(*weights, **kwargs)
+    return run_game_function(weights, **kwargs)
+
+
+# One seed per game, drawn from a master seed: the results don't depend on
+# how the games are split between the workers
+def game_seeds(seed, n):
+    rng = random.Random(seed)
+    return [rng.getrandbits(64) for _ in range(n)]
+
+
+# The unseeded games of the workers draw their courses from the random
+# module, which CPython reseeds in a forked child (spawn and forkserver
+# workers start with a fresh one): the workers don't play the same courses
+def _init_worker(preload):
+    for name in preload:
+        importlib.import_module(name)
+
+
+def _worker_ready(_):
+    return os.getpid()
+
+
+def _play_chunk(run_game_function, chunk, seeds, max_frames):
+    return [play(run_game_function, weights, seed, max_frames) for weights, seed in zip(chunk, seeds)]
+
+
+# Plays games in a pool of processes (the games are pure Python, threads
+# would be serialized by the GIL). The pool is kept between calls, so one
+# Evaluator should be used for the whole training.
+# With a cache (cache.FitnessCache), the seeded games already played are not
+# sent to the workers.
+# The workers are started and import the preload modules when the Evaluator
+# is created, not at the first evaluation.
+# start_method: "fork", "spawn" or "forkserver" (None: the default of the
+# platform). With "forkserver" the preload modules are imported once by the
+# server and the workers are forked from it already warm, without copying
+# the memory of the parent (a notebook kernel...).
+class Evaluator:
+    def __init__(self, max_workers=None, chunksize=None, cache=None, preload=GAME_MODULES, start_method=None):
+        self.max_workers = max_workers or os.cpu_count()
+        self.chunksize = chunksize
+        self.cache = cache
+        context = multiprocessing.get_context(start_method)
+        if start_method == "forkserver":
+            context.set_forkserver_preload(list(preload))
+        self.executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context, initializer=_init_worker, initargs=(tuple(preload),))
+        self.warm_up()
+
+    # Starts every worker (one task each), returns their pids
+    def warm_up(self):
+        return set(self.executor.map(_worker_ready, range(self.max_workers)))
+
+    # seeds: one seed per game (None for an unseeded game)
+    def evaluate(self, run_game_function, weights_list, seeds=None, max_frames=None):
+        weights_list = list(weights_list)
+        if not weights_list:
+            return []
+        if seeds is None:
+            seeds = [None] * len(weights_list)
+        elif len(seeds) != len(weights_list):
+            raise ValueError(f"got {len(seeds)} seeds for {len(weights_list)} games")
+
+        scores = [None] * len(weights_list)
+        keys = [None] * len(weights_list)
+        todo = []
+        game = self.cache.game_key(run_game_function, max_frames) if self.cache is not None else None
+        for i, (weights, seed) in enumerate(zip(weights_list, seeds)):
+            if self.cache is not None and self.cache.cacheable(seed):
+                keys[i] = self.cache.key(run_game_function, weights, seed, max_frames, game)
+                scores[i] = self.cache.get(keys[i])
+            if scores[i] is None:
+                todo.append(i)
+        if not todo:
+            return scores
+
+        played = self.play_games(run_game_function, [weights_list[i] for i in todo], [seeds[i] for i in todo], max_frames)
+        for i, score in zip(todo, played):
+            scores[i] = score
+
+        if self.cache is not None:
+            self.cache.put_many([(keys[i], scores[i]) for i in todo if keys[i] is not None])
+        return scores
+
+    # Plays the games not found in the cache, returns their scores in order
+    def play_games(self, run_game_function, weights_list, seeds, max_frames):
+        chunksize = self.chunksize or max(1, len(weights_list) // (self.max_workers * 4))
+        starts = range(0, len(weights_list), chunksize)
+        futures = [
+            self.executor.submit(_play_chunk, run_game_function, weights_list[i:i + chunksize], seeds[i:i + chunksize], max_frames)
+            for i in starts
+        ]
+        return [score for future in futures for score in future.result()]
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Same interface as Evaluator, the games are played one after the other in
+# the calling process (no pool to start, nothing to pickle)
+class SerialEvaluator(Evaluator):
+    def __init__(self, cache=None):
+        self.max_workers = 1
+        self.chunksize = None
+        self.cache = cache
+
+    def play_games(self, run_game_function, weights_list, seeds, max_frames):
+        return _play_chunk(run_game_function, weights_list, seeds, max_frames)
+
+    def close(self):
+        pass
+
+
+def evaluate(run_game_function, weights_list, seeds=None, max_frames=None, max_workers=None, chunksize=None, cache=None, start_method=None):
+    with Evaluator(max_workers=max_workers, chunksize=chunksize, cache=cache, start_method=start_method) as evaluator:
+        return evaluator.evaluate(run_game_function, weights_list, seeds=seeds, max_frames=max_frames)
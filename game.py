@@ -0,0 +1,721 @@
+import math
+import sys
+import time
+from bisect import bisect_left, insort
+from operator import attrgetter
+
+from rng import make_rng
+from steadystate import SteadyStateDetector
+from collision import rect, colliderect, hits_pipe
+
+
+# Changed when a change of the engine changes the scores of the games: the
+# scores stored by cache.FitnessCache before it are not used anymore
+ENGINE_VERSION = 1
+
+
+def game_constants(module):
+    return {
+        name: value for name, value in vars(module).items()
+        if name.isupper() and isinstance(value, (int, float, str))
+    }
+
+
+# The constant block of a variant (jeuClassique, jeuComplexe...) as attributes:
+# config.GRAVITY, config.PIPE_GAP_INIT...
+class Config:
+    def __init__(self, variant):
+        constants = variant if isinstance(variant, dict) else game_constants(variant)
+        self.__dict__.update(constants)
+
+
+# The entities have __slots__: no __dict__ per object, and faster attributes
+class Bird:
+    __slots__ = ("gravity", "jump_strength", "x", "y", "velocity",
+                 "powerup_duration", "powerups", "powerUP", "invincibility_timer", "survived_powerup")
+
+    def __init__(self, config):
+        self.gravity = config.GRAVITY
+        self.jump_strength = config.JUMP_STRENGTH
+        self.x = 50
+        self.y = config.SCREEN_HEIGHT // 2
+        self.velocity = 0
+        # jeuPowerUP
+        self.powerup_duration = getattr(config, "POWERUP_DURATION", 0)
+        self.powerups = 0
+        self.powerUP = False
+        self.invincibility_timer = 0
+        self.survived_powerup = False
+
+    def update(self):
+        self.velocity += self.gravity
+        self.y += self.velocity
+        if self.powerUP:
+            self.invincibility_timer -= 1
+            if self.invincibility_timer <= 0:
+                self.powerUP = False
+                self.survived_powerup = True
+
+    def jump(self):
+        self.velocity = self.jump_strength
+
+    def use_powerup(self):
+        if self.powerups > 0 and not self.powerUP:
+            self.powerups -= 1
+            self.powerUP = True
+            self.invincibility_timer = self.powerup_duration
+            self.survived_powerup = False
+
+    def get_rect(self):
+        return rect(self.x - 20, self.y - 20, 40, 40)
+
+
+# The pipes are placed by place() when the course is built and each time they
+# are recycled: the objects are reused, and moved by PipeCourse.update().
+
+# jeuClassique
+class Pipe:
+    __slots__ = ("x", "height")
+    x_offset_bottom = 0
+
+    def place(self, config, x, gap, rng):
+        self.x = x
+        self.height = rng.randint(100, config.SCREEN_HEIGHT - gap - 100)
+
+
+# The other variants: the pipes oscillate and the bottom pipe can be shifted
+class MovingPipe:
+    __slots__ = ("base_x", "x", "x_offset_bottom", "base_height", "height", "osc_y", "osc_x")
+
+    def place(self, config, x, gap, rng):
+        self.base_x = x
+        self.x = x
+        self.x_offset_bottom = rng.randint(-config.PIPE_MAX_OFFSET, config.PIPE_MAX_OFFSET)
+        self.base_height = rng.randint(100, config.SCREEN_HEIGHT - gap - 100)
+        self.height = self.base_height
+        self.osc_y = rng.uniform(0, 2 * math.pi)
+        self.osc_x = rng.uniform(0, 2 * math.pi)
+
+
+# The pipes in a ring buffer ordered by x: pipes[head] is the leftmost pipe, a
+# recycled pipe is placed again at the end and head moves to the next slot.
+# cleared counts the pipes (from head) the bird has passed, so the next pipe
+# ahead of the bird is known without searching: pipes[(head + cleared) % len(pipes)].
+# A pipe is passed when both its top and bottom parts are behind the bird
+# (+ 20, the radius of the bird).
+class PipeCourse:
+    def __init__(self, config, moving, gap, rng):
+        self.config = config
+        self.moving = moving
+        self.pipe_width = config.PIPE_WIDTH
+        self.pipes = [MovingPipe() if moving else Pipe() for _ in range(config.NUM_PIPES)]
+        for i, pipe in enumerate(self.pipes):
+            pipe.place(config, config.SCREEN_WIDTH + i * 300, gap, rng)
+        self.head = 0
+        self.cleared = 0
+
+    def __iter__(self):
+        n = len(self.pipes)
+        for i in range(n):
+            yield self.pipes[(self.head + i) % n]
+
+    def first(self):
+        return self.pipes[self.head]
+
+    def next_pipe(self):
+        if self.cleared == len(self.pipes):
+            return None
+        return self.pipes[(self.head + self.cleared) % len(self.pipes)]
+
+    # The next pipe and the ones after it
+    def ahead(self):
+        n = len(self.pipes)
+        for i in range(self.cleared, n):
+            yield self.pipes[(self.head + i) % n]
+
+    def update(self, speed):
+        if not self.moving:
+            for pipe in self.pipes:
+                pipe.x -= speed
+            return
+
+        move_speed = self.config.PIPE_MOVE_SPEED
+        amplitude = self.config.PIPE_MOVE_AMPLITUDE
+        sin = math.sin
+        cos = math.cos
+        for pipe in self.pipes:
+            pipe.osc_y += move_speed
+            pipe.osc_x += move_speed
+            pipe.height = pipe.base_height + int(sin(pipe.osc_y) * amplitude)
+            pipe.x = pipe.base_x - speed + int(cos(pipe.osc_x) * 5)
+            pipe.base_x -= speed
+
+    # The leftmost pipe goes back at x
+    def recycle(self, x, gap, rng):
+        self.pipes[self.head].place(self.config, x, gap, rng)
+        self.head = (self.head + 1) % len(self.pipes)
+        if self.cleared > 0:
+            self.cleared -= 1
+
+    # Called once the pipes have moved
+    def advance(self, bird_x):
+        pipes = self.pipes
+        n = len(pipes)
+        while self.cleared < n:
+            pipe = pipes[(self.head + self.cleared) % n]
+            if max(pipe.x + self.pipe_width + 20, pipe.x + pipe.x_offset_bottom + self.pipe_width + 20) >= bird_x:
+                break
+            self.cleared += 1
+
+
+# Bonuses and power-ups are placed by place() when they appear: the objects
+# are reused (see CollectibleStore)
+class Bonus:
+    __slots__ = ("config", "radius", "x", "y")
+
+    def __init__(self, config):
+        self.config = config
+        self.radius = config.BONUS_RADIUS
+        self.x = self.y = 0
+
+    def place(self, rng):
+        self.x = self.config.SCREEN_WIDTH + rng.randint(100, 300)
+        self.y = rng.randint(100, self.config.SCREEN_HEIGHT - 100)
+
+    def get_rect(self):
+        return rect(self.x - self.radius, self.y - self.radius, self.radius * 2, self.radius * 2)
+
+
+class PowerUp:
+    __slots__ = ("config", "x", "y")
+    radius = 10
+
+    def __init__(self, config):
+        self.config = config
+        self.x = self.y = 0
+
+    def place(self, x, rng):
+        self.x = x
+        self.y = rng.randint(100, self.config.SCREEN_HEIGHT - 100)
+
+    def get_rect(self):
+        return rect(self.x - 10, self.y - 10, 20, 20)
+
+
+item_x = attrgetter("x")
+
+
+# The bonuses or power-ups on screen, ordered by x. They all move at the same
+# speed so the order never changes: an item is inserted at its place when it
+# appears (after the items with the same x, which appeared before), leaves from
+# the front when it goes off screen, or from anywhere when it is collected.
+# The items removed go to a pool and are reused. The number of items doesn't
+# grow with the length of the game.
+class CollectibleStore:
+    def __init__(self, new_item):
+        self.new_item = new_item
+        self.items = []
+        self.pool = []
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def spawn(self, *args):
+        item = self.pool.pop() if self.pool else self.new_item()
+        item.place(*args)
+        insort(self.items, item, key=item_x)
+        return item
+
+    def update(self, speed):
+        for item in self.items:
+            item.x -= speed
+
+    def evict_offscreen(self):
+        items = self.items
+        while items and items[0].x + items[0].radius <= 0:
+            self.pool.append(items.pop(0))
+
+    # The first item at x or after
+    def nearest_ahead(self, x):
+        i = bisect_left(self.items, x, key=item_x)
+        return self.items[i] if i < len(self.items) else None
+
+    # Removes the items touching bird_rect and returns how many there were
+    def collect(self, bird_rect):
+        items = self.items
+        right = bird_rect[0] + bird_rect[2]
+        collected = 0
+        i = 0
+        while i < len(items):
+            item = items[i]
+            if int(item.x - item.radius) >= right:
+                break
+            if colliderect(bird_rect, item.get_rect()):
+                self.pool.append(items.pop(i))
+                collected += 1
+            else:
+                i += 1
+        return collected
+
+
+# One game of any variant. All the state of the game (difficulty, frame,
+# entities, random generator) belongs to the object, so several games can run
+# in the same interpreter, one after the other or interleaved (threads, asyncio).
+#
+# variant: the module of the variant or a dict of its constants. What the game
+# contains follows from the constants: moving pipes (PIPE_MAX_OFFSET), wind
+# (WIND_STRENGTH), bonuses (BONUS_APPEAR_INTERVAL), power-ups (POWERUP_DURATION).
+# policy: function policy(game) returning the decision of the frame: jump, or
+# (jump, use_powerup) with power-ups.
+#
+#   game = Game(jeuClassique, jeuClassique.make_policy(weights), seed=1)
+#   while game.step():
+#       pass
+#   game.total_score()
+class Game:
+    def __init__(self, variant, policy=None, seed=None, max_frames=None, steady_pipes=None):
+        self.config = variant if isinstance(variant, Config) else Config(variant)
+        config = self.config
+        self.moving_pipes = hasattr(config, "PIPE_MAX_OFFSET")
+        self.has_wind = hasattr(config, "WIND_STRENGTH")
+        self.has_bonuses = hasattr(config, "BONUS_APPEAR_INTERVAL")
+        self.has_powerups = hasattr(config, "POWERUP_DURATION")
+
+        self.policy = policy
+        self.max_frames = config.MAX_FRAMES if max_frames is None else max_frames
+        # steady_pipes: stop after this many pipes once the difficulty is frozen (see steadystate.py)
+        self.steady_pipes = steady_pipes
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        config = self.config
+        self.rng = make_rng(seed)
+        self.pipe_gap = config.PIPE_GAP_INIT
+        self.pipe_speed = config.PIPE_SPEED_INIT
+        self.bird = Bird(config)
+        # created after the reset: their height depends on the gap
+        self.course = PipeCourse(config, self.moving_pipes, self.pipe_gap, self.rng)
+        self.bonuses = CollectibleStore(lambda: Bonus(config))
+        self.powerups = CollectibleStore(lambda: PowerUp(config))
+        self.wind = 0
+        self.score = 0
+        self.frame = 0
+        self.alive_distance = 0
+        self.pipe_count = 0
+        self.survival_bonuses = 0
+        self.action = None
+        self.steady = SteadyStateDetector(self.steady_pipes) if self.steady_pipes is not None else None
+        self.over = False
+        self.stop_reason = None
+
+    def difficulty_frozen(self):
+        return self.pipe_gap <= self.config.PIPE_GAP_MIN and self.pipe_speed >= self.config.PIPE_SPEED_MAX
+
+    def total_score(self):
+        if self.has_powerups:
+            return self.score + self.alive_distance
+        return self.score * 1000 + self.alive_distance
+
+    # Plays one frame. action: the decision of the frame, asked to the policy
+    # if None. Returns False once the game is over.
+    # The frame is played in phases (spawn, policy, physics, recycling,
+    # collision), each one a method or attribute that a Profiler can wrap.
+    def step(self, action=None):
+        self.spawn()
+
+        if action is None:
+            action = self.policy(self)
+        self.action = action
+
+        self.physics(action)
+        self.recycle()
+        collision = self.collide()
+
+        self.alive_distance += 1
+
+        if collision:
+            return self.end("collision")
+
+        self.frame += 1
+        if self.frame > self.max_frames:
+            return self.end("max_frames")
+
+        if self.steady is not None and self.steady.update(self.difficulty_frozen(), self.pipe_count, self.score, self.alive_distance):
+            final_distance = self.max_frames + 1
+            self.score = self.steady.extrapolate(self.score, self.alive_distance, final_distance)
+            self.alive_distance = final_distance
+            return self.end("steady_state")
+
+        return True
+
+    # Bonuses, wind and power-ups drawn for the frame
+    def spawn(self):
+        config = self.config
+        rng = self.rng
+
+        if self.has_bonuses and self.frame % config.BONUS_APPEAR_INTERVAL == 0:
+            self.bonuses.spawn(rng)
+
+        if self.has_wind:
+            self.wind = rng.uniform(-config.WIND_STRENGTH, config.WIND_STRENGTH)
+
+        if self.has_powerups:
+            if int(rng.uniform(0, config.PROBA_POWER_UP)) == 1:
+                self.powerups.spawn(config.SCREEN_WIDTH + 100, rng)
+
+            bird = self.bird
+            if bird.survived_powerup:
+                self.score += config.SURVIVAL_BONUS
+                self.survival_bonuses += 1
+                bird.survived_powerup = False
+
+    def physics(self, action):
+        bird = self.bird
+        jump, use = action if self.has_powerups else (action, False)
+        if jump:
+            bird.jump()
+        if use:
+            bird.use_powerup()
+
+        if self.has_wind:
+            bird.velocity += self.config.GRAVITY + self.wind
+        bird.update()
+
+        speed = self.pipe_speed
+        self.course.update(speed)
+        self.bonuses.update(speed)
+        self.powerups.update(speed)
+
+    # Pipes gone off screen placed again after the last one, scoring
+    def recycle(self):
+        config = self.config
+        course = self.course
+        bird = self.bird
+
+        # NIVEAUX DE DIFFICULTES
+        while course.first().x + config.PIPE_WIDTH < 0:
+            course.recycle(300 * config.NUM_PIPES - config.PIPE_WIDTH, self.pipe_gap, self.rng)
+            if not self.has_powerups:
+                self.score += 1
+            elif bird.powerUP:
+                self.score += 1000 * config.POWERUP_SCORE_MULTIPLIER
+            self.pipe_count += 1
+            if self.pipe_count % 5 == 0:
+                if self.pipe_gap > config.PIPE_GAP_MIN:
+                    self.pipe_gap -= 10
+                if self.pipe_speed < config.PIPE_SPEED_MAX:
+                    self.pipe_speed += 0.5
+
+        course.advance(bird.x)
+
+    # Collisions with the edges and the pipes, bonuses and power-ups collected.
+    # Returns True if the bird crashed.
+    def collide(self):
+        config = self.config
+        bird = self.bird
+
+        bird_rect = bird.get_rect()
+        collision = bird.y > config.SCREEN_HEIGHT or bird.y < 0
+        if not collision:
+            # The pipes passed are behind the bird, and the pipes are further
+            # apart than their offsets: the test stops at the first pipe
+            # starting after the bird.
+            bird_right = bird_rect[0] + bird_rect[2]
+            gap = self.pipe_gap
+            for pipe in self.course.ahead():
+                if min(pipe.x, pipe.x + pipe.x_offset_bottom) >= bird_right:
+                    break
+                if hits_pipe(bird_rect, pipe.x, pipe.x + pipe.x_offset_bottom, config.PIPE_WIDTH, pipe.height, pipe.height + gap, config.SCREEN_HEIGHT):
+                    collision = True
+                    break
+
+        if self.has_bonuses:
+            self.bonuses.evict_offscreen()
+            self.score += self.bonuses.collect(bird_rect) * (config.BONUS_SCORE // 1000)
+
+        if self.has_powerups:
+            self.powerups.evict_offscreen()
+            bird.powerups += self.powerups.collect(bird_rect)
+            if bird.powerUP:
+                collision = False
+
+        return collision
+
+    def end(self, stop_reason):
+        self.over = True
+        self.stop_reason = stop_reason
+        return False
+
+    # Plays the game until the end and returns its score.
+    # render/manual: window (manual: space to jump, p to use a power-up)
+    # fps: overrides FPS, 0 = no limit. video_path: records the window.
+    # replay: replay.Replay recording the game, decisions: decisions of a replay to play back
+    # info: dict receiving stop_reason and frames
+    # profiler: profiler.Profiler timing the phases of the frames, its report
+    # is put in info["phases"]
+    # viewer: Viewer drawing only some of the frames, with keys to change the
+    # speed, pause and play frame by frame (implies render=True)
+    def run(self, render=False, manual=False, fps=None, video_path=None, replay=None, decisions=None, info=None, profiler=None, viewer=None):
+        if viewer is not None:
+            if manual:
+                raise ValueError("the keys of the viewer are the keys of the manual mode")
+            render = True
+        display = get_display(self.config) if render or manual else None
+        draw = display.draw if render else None
+
+        if profiler is not None:
+            profiler.attach(self)
+            if render:
+                draw = profiler.wrap("render", draw)
+
+        video = None
+        # the video is closed and the profiler taken off the game even if a
+        # frame raises or the game is interrupted: the mp4 would be truncated,
+        # the wrappers of the profiler (and tracemalloc) would stay
+        try:
+            if video_path is not None:
+                if not render:
+                    raise ValueError("video_path needs render=True")
+                from capture import VideoWriter
+                video = VideoWriter(video_path, self.config.FPS)
+
+            if viewer is not None:
+                viewer.start(display, self.config.FPS if fps is None else fps)
+
+            while not self.over:
+                if viewer is not None:
+                    viewer.handle_events(self, video)
+                elif render:
+                    display.handle_events(video)
+
+                action = None
+                if decisions is not None:
+                    action = next(decisions)
+                elif manual:
+                    action = display.manual_action(self.has_powerups)
+
+                self.step(action)
+                if replay is not None:
+                    if self.has_powerups:
+                        replay.record(*self.action)
+                    else:
+                        replay.record(self.action)
+
+                if viewer is not None:
+                    if viewer.should_draw(self):
+                        draw(self)
+                        if video is not None:
+                            video.add(display.screen)
+                        display.tick(viewer.tick_fps())
+                elif render:
+                    draw(self)
+                    if video is not None:
+                        video.add(display.screen)
+                    display.tick(self.config.FPS if fps is None else fps)
+        finally:
+            try:
+                if video is not None:
+                    video.close()
+            finally:
+                if profiler is not None:
+                    profiler.detach(self)
+
+        if info is not None:
+            info["stop_reason"] = self.stop_reason
+            info["frames"] = self.frame
+            if profiler is not None:
+                info["phases"] = profiler.report()
+
+        total_score = self.total_score()
+        if replay is not None:
+            replay.finish(total_score)
+        return total_score
+
+
+# pygame is only loaded when a game is displayed, and there is only one window
+display = None
+
+
+def get_display(config):
+    global display
+    if display is None or display.size != (config.SCREEN_WIDTH, config.SCREEN_HEIGHT):
+        display = Display(config.SCREEN_WIDTH, config.SCREEN_HEIGHT)
+    return display
+
+
+class Display:
+    def __init__(self, width, height):
+        import pygame
+        pygame.init()
+        self.pygame = pygame
+        self.size = (width, height)
+        self.screen = pygame.display.set_mode(self.size)
+        self.clock = pygame.time.Clock()
+        self.font = pygame.font.SysFont(None, 36)
+        self.small_font = pygame.font.SysFont(None, 24)
+
+    def handle_events(self, video=None):
+        pygame = self.pygame
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.quit(video)
+
+    def quit(self, video=None):
+        if video is not None:
+            video.close()
+        self.pygame.quit()
+        sys.exit()
+
+    def manual_action(self, powerups):
+        keys = self.pygame.key.get_pressed()
+        if powerups:
+            return keys[self.pygame.K_SPACE], keys[self.pygame.K_p]
+        return keys[self.pygame.K_SPACE]
+
+    def draw(self, game):
+        pygame = self.pygame
+        screen = self.screen
+        config = game.config
+        bird = game.bird
+
+        screen.fill((135, 206, 250))
+
+        color = (0, 0, 255) if bird.powerUP else (255, 255, 0)
+        pygame.draw.circle(screen, color, (int(bird.x), int(bird.y)), 20)
+
+        for pipe in game.course:
+            pygame.draw.rect(screen, (0, 255, 0), pygame.Rect(pipe.x, 0, config.PIPE_WIDTH, pipe.height))
+            pygame.draw.rect(screen, (0, 255, 0), pygame.Rect(pipe.x + pipe.x_offset_bottom, pipe.height + game.pipe_gap, config.PIPE_WIDTH, config.SCREEN_HEIGHT))
+
+        for b in game.bonuses:
+            pygame.draw.circle(screen, (255, 0, 255), (int(b.x), int(b.y)), config.BONUS_RADIUS)
+
+        for p in game.powerups:
+            pygame.draw.circle(screen, (255, 0, 255), (int(p.x), int(p.y)), 10)
+
+        if not game.has_powerups:
+            score_text = self.font.render(f"Score: {game.score}", True, (0, 0, 0))
+            screen.blit(score_text, (10, 10))
+        else:
+            score_text = self.font.render(f"Score: {game.total_score()}", True, (0, 0, 0))
+            screen.blit(score_text, (10, 10))
+
+            info_text = self.font.render(f"Pipes: {game.pipe_count} | PowerUps: {bird.powerups}", True, (0, 0, 0))
+            screen.blit(info_text, (10, 50))
+
+            if bird.powerUP:
+                powerup_status = self.small_font.render(f"PowerUp Active: x{config.POWERUP_SCORE_MULTIPLIER} (Time: {bird.invincibility_timer})", True, (0, 0, 255))
+                screen.blit(powerup_status, (10, 90))
+
+            if game.survival_bonuses > 0:
+                survival_info = self.small_font.render(f"Survival Bonuses: {game.survival_bonuses} x {config.SURVIVAL_BONUS}", True, (255, 0, 0))
+                screen.blit(survival_info, (10, 130))
+
+        pygame.display.flip()
+
+    def tick(self, fps):
+        self.clock.tick(fps)
+
+
+MAX_SPEED = 256
+
+
+# Watches a game faster than real time. The game is played at full speed and
+# only some frames are drawn:
+# - speed k: one frame in k is drawn, at the FPS of the variant (x k)
+# - speed None: the frames are drawn on a wall clock budget, fps per second,
+#   and the game runs as fast as it can in between (fps 0, no limit: every
+#   frame is drawn)
+# The frames drawn don't change the game: the score is the one of the same
+# game played without a window.
+# Keys: space or P pause, right arrow or N plays one frame (and pauses),
+# up arrow or + doubles the speed, down arrow or - halves it (after
+# MAX_SPEED comes None, as fast as possible).
+class Viewer:
+    def __init__(self, speed=1):
+        self.speed = speed
+        self.paused = False
+        self.steps = 0
+        self.fps = None
+        self.last_draw = 0.0
+
+    def start(self, display, fps):
+        self.display = display
+        self.fps = fps
+        self.last_draw = 0.0
+        self.show_status()
+
+    def show_status(self):
+        speed = "max" if self.speed is None else f"x{self.speed}"
+        status = " (pause)" if self.paused else ""
+        self.display.pygame.display.set_caption(f"Flappy Bird {speed}{status}")
+
+    def faster(self):
+        if self.speed is not None:
+            self.speed = None if self.speed >= MAX_SPEED else self.speed * 2
+
+    def slower(self):
+        if self.speed is None:
+            self.speed = MAX_SPEED
+        elif self.speed > 1:
+            self.speed //= 2
+
+    def key(self, key):
+        pygame = self.display.pygame
+        if key in (pygame.K_SPACE, pygame.K_p):
+            self.paused = not self.paused
+        elif key in (pygame.K_RIGHT, pygame.K_n):
+            self.paused = True
+            self.steps += 1
+        elif key in (pygame.K_UP, pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+            self.faster()
+        elif key in (pygame.K_DOWN, pygame.K_MINUS, pygame.K_KP_MINUS):
+            self.slower()
+        self.show_status()
+
+    # Called before each frame, waits as long as the game is paused
+    def handle_events(self, game, video=None):
+        display = self.display
+        pygame = display.pygame
+        while True:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    display.quit(video)
+                elif event.type == pygame.KEYDOWN:
+                    self.key(event.key)
+            if not self.paused:
+                return
+            if self.steps:
+                self.steps -= 1
+                return
+            display.draw(game)
+            display.tick(30)
+
+    # Called after each frame
+    def should_draw(self, game):
+        if self.paused or game.over:
+            return True
+        if self.speed is not None:
+            return game.frame % self.speed == 0
+        if not self.fps:
+            return True
+        now = time.perf_counter()
+        if now - self.last_draw >= 1 / self.fps:
+            self.last_draw = now
+            return True
+        return False
+
+    def tick_fps(self):
+        # clock.tick(0) doesn't wait
+        return 0 if self.speed is None else self.fps
+
+
+# Viewer of the command line of the variants:
+# python jeuClassique.py weights.json [speed], speed: an int or max
+def viewer_from_argv(argv, position=2):
+    if len(argv) <= position:
+        return Viewer()
+    return Viewer(None if argv[position] == "max" else int(argv[position]))
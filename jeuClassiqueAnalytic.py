@@ -0,0 +1,144 @@
+import math
+
+import jeuClassique
+from game import Game
+from jeuClassique import SCREEN_HEIGHT, PIPE_WIDTH, MAX_FRAMES, make_policy
+
+BIRD_X = 50
+
+
+# Same game as jeuClassique.run_game, same score for the same seed, but the
+# frames where nothing happens are not played one by one.
+#
+# Between two jumps the bird falls: after m frames without jumping
+#   4 * y = 4 * y0 + m * (4 * v0 + 1) + m²      velocity = v0 + m / 2
+# and the pipes move by m * pipe_speed. Every value of the game is a multiple
+# of 0.5, so these formulas give exactly the floats that m frames would give.
+# The game jumps straight over the frames that are sure to be quiet: no jump,
+# no collision, no pipe recycled or passed, no pipe coming over the bird, no
+# end of the game. The frame that breaks one of these is played by Game.step,
+# as in run_game. The score, the difficulty and the steady state
+# (steady_pipes) only change when a pipe is recycled.
+#
+# The decision of the policy is a quadratic in m too. It is the only value
+# that is rounded: a frame is only skipped if the decision is above a margin
+# far larger than the rounding errors, the frames close to a jump are played.
+# check_analytic.py compares the two on random and degenerate weights.
+def run_game_analytic(weights, seed=None, max_frames=MAX_FRAMES, steady_pipes=None, info=None):
+    game = Game(jeuClassique, make_policy(weights), seed, max_frames, steady_pipes)
+    # as in the policy, the weights missing give no term and the extra ones are ignored
+    weights = (list(weights) + [0.0] * jeuClassique.N_INPUTS)[:jeuClassique.N_INPUTS]
+    margin = 1e-9 * sum(abs(w) for w in weights)
+
+    while not game.over:
+        frames = quiet_frames(game, weights, margin)
+        if frames:
+            skip(game, frames)
+        else:
+            game.step()
+
+    if info is not None:
+        info["stop_reason"] = game.stop_reason
+        info["frames"] = game.frame
+    return game.total_score()
+
+
+# Plays frames frames without jump, collision or pipe event
+def skip(game, frames):
+    bird = game.bird
+    bird.y = (4 * bird.y + frames * (4 * bird.velocity + 1) + frames * frames) / 4
+    bird.velocity += frames / 2
+    moved = game.pipe_speed * frames
+    for pipe in game.course.pipes:
+        pipe.x -= moved
+    game.frame += frames
+    game.alive_distance += frames
+    game.action = False
+
+
+# Number of frames from now that are sure to be quiet (see run_game_analytic)
+def quiet_frames(game, weights, margin):
+    frames = game.max_frames - game.frame
+    bird = game.bird
+    y, v = bird.y, bird.velocity
+    gap = game.pipe_gap
+    speed = game.pipe_speed
+
+    next_pipe = game.course.next_pipe()
+    if next_pipe is not None:
+        # the decision of this frame, no jump while it is >= 0
+        w_top, w_bottom, w_dx, w_v, w_alt = weights
+        w_y = w_top + w_bottom + w_alt
+        decision = (w_y * y - w_top * next_pipe.height - w_bottom * (next_pipe.height + gap)
+                    + w_dx * (next_pipe.x - BIRD_X) + w_v * v)
+        if decision < margin:
+            return 0
+
+    # Each pipe until its next event: x < 70 it comes over the bird, x < -20
+    # it is passed, x < -50 it is recycled (only the first pipe gets there).
+    # While a pipe is over the bird, the bird stays between its two parts:
+    # height + 20 <= y < height + gap - 19 (bird rect truncated to int)
+    low = 0
+    high = 4 * SCREEN_HEIGHT
+    for pipe in game.course.pipes:
+        x = pipe.x
+        if x >= BIRD_X + 20:
+            event = BIRD_X + 20
+        elif x >= BIRD_X - 70:
+            event = BIRD_X - 70
+            low = max(low, 4 * (pipe.height + 20))
+            high = min(high, 4 * (pipe.height + gap - 19) - 1)
+        else:
+            event = -PIPE_WIDTH
+        frames = min(frames, int((x - event) // speed))
+    if frames <= 0:
+        return 0
+
+    # 4 * y after m frames, m >= 1, stays in [low, high]
+    b, c = 4 * v + 1, 4 * y
+    frames = safe_frames(1, b, c - low, 1, frames)
+    frames = safe_frames(-1, -b, high - c, 1, frames)
+    if frames <= 1 or next_pipe is None:
+        return frames
+
+    # the decision before frame j, from y, velocity and x of the next pipe after j frames
+    return 1 + safe_frames(0.25 * w_y, w_y * (v + 0.25) - w_dx * speed + 0.5 * w_v, decision, 1, frames - 1, margin)
+
+
+# Number k <= count such that a * j² + b * j + c >= margin for the k integers
+# j from start. The first root after start gives k, which is then checked: a
+# quadratic is lowest at the ends of an interval or around its vertex.
+def safe_frames(a, b, c, start, count, margin=0.0):
+    def f(j):
+        return (a * j + b) * j + c
+
+    if count <= 0 or f(start) < margin:
+        return 0
+    end = start + count
+
+    shifted = c - margin
+    if a == 0:
+        roots = [-shifted / b] if b < 0 else []
+    else:
+        delta = b * b - 4 * a * shifted
+        if delta < 0:
+            roots = []
+        else:
+            root = math.sqrt(delta)
+            roots = [(-b - root) / (2 * a), (-b + root) / (2 * a)]
+
+    stop = end
+    for root in roots:
+        if start <= root < end:
+            stop = min(stop, math.floor(root) + 1)
+
+    # the root may be off by a little
+    while stop > start and f(stop - 1) < margin:
+        stop -= 1
+    if a > 0:
+        vertex = -b / (2 * a)
+        if start < vertex < stop - 1:
+            j = math.floor(vertex)
+            if f(j) < margin or f(j + 1) < margin:
+                return 0
+    return stop - start
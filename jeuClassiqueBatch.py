@@ -0,0 +1,102 @@
+import numpy as np
+
+from rng import make_rng
+from jeuClassique import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, GRAVITY, JUMP_STRENGTH, PIPE_WIDTH,
+    PIPE_GAP_INIT, PIPE_SPEED_INIT, PIPE_GAP_MIN, PIPE_SPEED_MAX, NUM_PIPES, MAX_FRAMES,
+)
+
+BIRD_X = 50
+
+
+# Same game as jeuClassique.run_game, but a whole population of N birds plays
+# the same pipe course at once. The pipes and the difficulty only depend on the
+# frame number, so they are shared; only the birds are stored in arrays.
+def run_game_batch(weights, seed=None, max_frames=MAX_FRAMES):
+    weights = np.asarray(weights, dtype=float)
+    if weights.ndim != 2 or weights.shape[1] != 5:
+        raise ValueError(f"weights must have shape (N, 5), got {weights.shape}")
+    rng = make_rng(seed)
+
+    n = weights.shape[0]
+    w_top, w_bottom, w_dx, w_v, w_alt = weights.T
+
+    y = np.full(n, float(SCREEN_HEIGHT // 2))
+    velocity = np.zeros(n)
+    alive = np.ones(n, dtype=bool)
+    score = np.zeros(n, dtype=np.int64)
+    alive_distance = np.zeros(n, dtype=np.int64)
+
+    pipe_gap = PIPE_GAP_INIT
+    pipe_speed = PIPE_SPEED_INIT
+    # [x, height], kept in the same order as the pipes list of run_game
+    pipes = [[SCREEN_WIDTH + i * 300, rng.randint(100, SCREEN_HEIGHT - pipe_gap - 100)] for i in range(NUM_PIPES)]
+    pipe_count = 0
+    frame = 0
+
+    while True:
+        # Decision (should_jump): the next pipe is the same for every bird
+        next_pipe = None
+        min_dist = float('inf')
+        for pipe in pipes:
+            dx = (pipe[0] + PIPE_WIDTH + 20) - BIRD_X
+            if dx < 0:
+                continue
+            if dx < min_dist:
+                min_dist = dx
+                next_pipe = pipe
+
+        if next_pipe is not None:
+            pipe_top_height = next_pipe[1]
+            pipe_bottom_height = next_pipe[1] + pipe_gap
+            dx = next_pipe[0] - BIRD_X
+            decision = (w_top * (y - pipe_top_height) +
+                        w_bottom * (y - pipe_bottom_height) +
+                        w_dx * dx +
+                        w_v * velocity +
+                        w_alt * y)
+            velocity[decision < 0] = JUMP_STRENGTH
+
+        # Physics (dead birds keep moving, they are masked out of the scores)
+        velocity += GRAVITY
+        y += velocity
+        for pipe in pipes:
+            pipe[0] -= pipe_speed
+
+        # Difficulty levels, same (list-mutating) loop as run_game
+        for pipe in pipes:
+            if pipe[0] + PIPE_WIDTH < 0:
+                pipes.remove(pipe)
+                pipes.append([300 * NUM_PIPES - PIPE_WIDTH, rng.randint(100, SCREEN_HEIGHT - pipe_gap - 100)])
+                score[alive] += 1
+                pipe_count += 1
+                if pipe_count % 5 == 0:
+                    if pipe_gap > PIPE_GAP_MIN:
+                        pipe_gap -= 10
+                    if pipe_speed < PIPE_SPEED_MAX:
+                        pipe_speed += 0.5
+
+        # Collision, with the integer truncation pygame.Rect applies to floats
+        collision = (y > SCREEN_HEIGHT) | (y < 0)
+        bird_left = int(BIRD_X - 20)
+        bird_top = np.trunc(y - 20)
+        for pipe in pipes:
+            pipe_left = int(pipe[0])
+            if not (bird_left < pipe_left + PIPE_WIDTH and pipe_left < bird_left + 40):
+                continue
+            pipe_height = int(pipe[1])
+            hits_top = bird_top < pipe_height
+            hits_bottom = bird_top + 40 > pipe_height + pipe_gap
+            collision |= hits_top | hits_bottom
+
+        alive_distance[alive] += 1
+        alive &= ~collision
+
+        if not alive.any():
+            break
+
+        frame += 1
+        if frame > max_frames:
+            break
+
+    return score * 1000 + alive_distance
@@ -1,11 +1,6 @@
-import pygame
-import random
 import sys
-import math
-import matplotlib.pyplot as plt
-import sys
-import random
-import os
+from game import Game, viewer_from_argv
+from policy import LinearPolicy
 
 # --- Constantes ---
 SCREEN_WIDTH = 400
@@ -14,12 +9,13 @@ GRAVITY = 0.3
  
 JUMP_STRENGTH = -8
 PIPE_WIDTH = 50
-PIPE_GAP = 0
-PIPE_SPEED = 0
 PIPE_GAP_INIT = 200
 PIPE_SPEED_INIT = 1
+PIPE_GAP_MIN = 60
+PIPE_SPEED_MAX = 10
 FPS = 60
 NUM_PIPES = 3
+MAX_FRAMES = 30000
 WIND_STRENGTH = 0
 GRACE_PERIOD = 0
 PIPE_MOVE_AMPLITUDE = 0
@@ -30,210 +26,46 @@ BONUS_RADIUS = 10
 BONUS_SCORE = 5000
 
 
-class Bird:
-    def __init__(self):
-        self.x = 50
-        self.y = SCREEN_HEIGHT // 2
-        self.velocity = 0
-
-    def update(self):
-        self.velocity += GRAVITY
-        self.y += self.velocity
-
-    def jump(self):
-        self.velocity = JUMP_STRENGTH
-
-    def get_rect(self):
-        return pygame.Rect(self.x - 20, self.y - 20, 40, 40)
-
-class Pipe:
-    def __init__(self, x):
-        self.base_x = x
-        self.x = x
-        self.x_offset_bottom = random.randint(-PIPE_MAX_OFFSET, PIPE_MAX_OFFSET)
-        self.base_height = random.randint(100, SCREEN_HEIGHT - PIPE_GAP - 100)
-        self.height = self.base_height
-        self.osc_y = random.uniform(0, 2 * math.pi)
-        self.osc_x = random.uniform(0, 2 * math.pi)
-
-    def update(self):
-        self.osc_y += PIPE_MOVE_SPEED
-        self.osc_x += PIPE_MOVE_SPEED
-        self.height = self.base_height + int(math.sin(self.osc_y) * PIPE_MOVE_AMPLITUDE)
-        self.x = self.base_x - PIPE_SPEED + int(math.cos(self.osc_x) * 5)
-        self.base_x -= PIPE_SPEED
-
-    def collides_with(self, bird_rect):
-        pipe_top = pygame.Rect(self.x, 0, PIPE_WIDTH, self.height)
-        pipe_bottom = pygame.Rect(self.x + self.x_offset_bottom, self.height + PIPE_GAP, PIPE_WIDTH, SCREEN_HEIGHT)
-        return bird_rect.colliderect(pipe_top) or bird_rect.colliderect(pipe_bottom)
-
-class Bonus:
-    def __init__(self):
-        self.x = SCREEN_WIDTH + random.randint(100, 300)
-        self.y = random.randint(100, SCREEN_HEIGHT - 100)
-        self.collected = False
-
-    def update(self):
-        self.x -= PIPE_SPEED
-
-    def get_rect(self):
-        return pygame.Rect(self.x - BONUS_RADIUS, self.y - BONUS_RADIUS, BONUS_RADIUS * 2, BONUS_RADIUS * 2)
-
-def should_jump_complexe(bird, pipes, weights, bonus):
-    min_dist = float('inf')
-    next_pipe = None
-    for pipe in pipes:
-        pipe_end = max(pipe.x + PIPE_WIDTH + 20, pipe.x + pipe.x_offset_bottom + PIPE_WIDTH + 20)
-
-        if pipe_end < bird.x:
-            continue
-
-        dx = pipe.x - bird.x
-        if dx < min_dist:
-            min_dist = dx
-            next_pipe = pipe
+N_INPUTS = 7
+
 
+def inputs(game, buffer):
+    bird = game.bird
+    next_pipe = game.course.next_pipe()
     if not next_pipe:
         return False 
 
-    pipe_top_height = next_pipe.height
-    pipe_bottom_height = next_pipe.height + PIPE_GAP
-    dx = next_pipe.x - bird.x 
-
-    dy_top = bird.y - pipe_top_height
-    dy_bottom = bird.y - pipe_bottom_height
-    v = bird.velocity
-    altitude = bird.y
-
-
     dx_bonus = 999
     dy_bonus = 999
-    if bonus:
-        min_dist = float('inf')
-        closest_bonus = None
-        for b in bonus:
-            if b.collected:
-                continue
-            dist = b.x - bird.x
-            if 0 <= dist < min_dist:
-                min_dist = dist
-                closest_bonus = b
-        if closest_bonus:
-            dx_bonus = closest_bonus.x - bird.x
-            dy_bonus = closest_bonus.y - bird.y
-
-
-    inputs = [dy_top, dy_bottom, dx, v, altitude, dx_bonus, dy_bonus]
-    decision = sum(w * i for w, i in zip(weights, inputs))
-    return decision < 0
-
-def run_game_classique_bonus(weights=None, render=False, manual=False):
-    global PIPE_GAP, PIPE_SPEED, PIPE_GAP_INIT, PIPE_SPEED_INIT, frame
-
-    bird = Bird()
-    pipes = [Pipe(SCREEN_WIDTH + i * 300) for i in range(NUM_PIPES)]
-    score = 0
-    frame = 0
-    alive_distance = 0
-    pipe_count = 0
-    wind = 0
-    bonuses = []
-
-    PIPE_SPEED = PIPE_SPEED_INIT
-    PIPE_GAP = PIPE_GAP_INIT
-
-    frame_files = []
-    os.makedirs("frames", exist_ok=True)
-
-    while True:
-        if render:
-            screen.fill((135, 206, 250))
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-
-        if frame % BONUS_APPEAR_INTERVAL == 0:
-            bonuses.append(Bonus())
-
-        wind = random.uniform(-WIND_STRENGTH, WIND_STRENGTH)
-
-        if manual:
-            keys = pygame.key.get_pressed()
-            if keys[pygame.K_SPACE]:
-                bird.jump()
-        else:
-            if should_jump_complexe(bird, pipes, weights, bonuses):
-                bird.jump()
-
-        bird.velocity += GRAVITY + wind
-        bird.update()
-        for pipe in pipes:
-            pipe.update()
-        for b in bonuses:
-            b.update()
-
-        for pipe in pipes:
-            if pipe.x + PIPE_WIDTH < 0:
-                pipes.remove(pipe)
-                pipes.append(Pipe(300 * NUM_PIPES - PIPE_WIDTH))
-                score += 1
-                pipe_count += 1
-                if pipe_count % 5 == 0:
-                    if PIPE_GAP > 60:
-                        PIPE_GAP -= 10
-                    if PIPE_SPEED < 10:
-                        PIPE_SPEED += 0.5
-
-        bird_rect = bird.get_rect()
-        collision = (
-            bird.y > SCREEN_HEIGHT or bird.y < 0 or
-            any(pipe.collides_with(bird_rect) for pipe in pipes)
-        )
-
-        bonuses = [b for b in bonuses if b.x + BONUS_RADIUS > 0 and not b.collected]
-
-        for b in bonuses:
-            if bird_rect.colliderect(b.get_rect()):
-                score += BONUS_SCORE // 1000
-                b.collected = True
-
-        alive_distance += 1
-
-        if render:
-            pygame.draw.circle(screen, (255, 255, 0), (int(bird.x), int(bird.y)), 20)
-            for pipe in pipes:
-                pygame.draw.rect(screen, (0, 255, 0), pygame.Rect(pipe.x, 0, PIPE_WIDTH, pipe.height))
-                pygame.draw.rect(screen, (0, 255, 0), pygame.Rect(pipe.x + pipe.x_offset_bottom, pipe.height + PIPE_GAP, PIPE_WIDTH, SCREEN_HEIGHT))
-
-            for b in bonuses:
-                if not b.collected:
-                    pygame.draw.circle(screen, (255, 0, 255), (int(b.x), int(b.y)), BONUS_RADIUS)
-
-            score_text = font.render(f"Score: {score}", True, (0, 0, 0))
-            screen.blit(score_text, (10, 10))
-            pygame.display.flip()
-            clock.tick(FPS)
-
+    closest_bonus = game.bonuses.nearest_ahead(bird.x)
+    if closest_bonus:
+        dx_bonus = closest_bonus.x - bird.x
+        dy_bonus = closest_bonus.y - bird.y
 
-        if collision or frame > 30000:
-            break
+    buffer[0] = bird.y - next_pipe.height                    # dy_top
+    buffer[1] = bird.y - (next_pipe.height + game.pipe_gap)  # dy_bottom
+    buffer[2] = next_pipe.x - bird.x                         # dx
+    buffer[3] = bird.velocity
+    buffer[4] = bird.y                                       # altitude
+    buffer[5] = dx_bonus
+    buffer[6] = dy_bonus
+    return True
 
-        frame += 1
 
+def make_policy(weights):
+    return LinearPolicy(weights, inputs, N_INPUTS)
 
 
-    return score * 1000 + alive_distance
-
+def run_game_classique_bonus(weights=None, render=False, manual=False, seed=None, max_frames=MAX_FRAMES, steady_pipes=None, info=None, video_path=None, replay=None, decisions=None, fps=None, profiler=None, viewer=None):
+    # replay: replay.Replay recording the game, decisions: decisions of a replay to play back,
+    # profiler: profiler.Profiler timing the phases of the frames, viewer: game.Viewer (fast-forward)
+    if replay is not None:
+        seed = replay.start(run_game_classique_bonus, seed, max_frames, steady_pipes)
+    game = Game(sys.modules[__name__], make_policy(weights), seed, max_frames, steady_pipes)
+    return game.run(render, manual, fps, video_path, replay, decisions, info, profiler, viewer)
 
 
 if __name__ == "__main__":
-    pygame.init()
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-    clock = pygame.time.Clock()
-    font = pygame.font.SysFont(None, 36)
-
     import json
 
     if len(sys.argv) < 2:
@@ -242,6 +74,6 @@ if __name__ == "__main__":
     with open(sys.argv[1], 'r') as f:
         weights = json.load(f)
 
-    score = run_game_classique_bonus(weights=weights, render=True, manual=False)
+    score = run_game_classique_bonus(weights=weights, render=True, manual=False, viewer=viewer_from_argv(sys.argv))
 
     print("Score final :", score)
@@ -0,0 +1,88 @@
+import multiprocessing
+import time
+
+from game import Viewer
+from training import dimension, flatten, unflatten
+
+# Window showing the best weights of a training while it runs:
+#
+#   viewer = LiveViewer(run_game, 5)
+#   hill_climb(run_game, 5, generations=50000, viewer=viewer)
+#   viewer.close()
+#
+# The games are played and drawn by another process, started once. The
+# trainer writes each new best in shared memory and goes on: show() copies a
+# few floats and never waits for the window. The window plays games with the
+# last weights it got, and starts a new game as soon as better weights come.
+# The weights are written between two increments of a version counter (odd
+# while writing): the window reads them again if the version changed meanwhile.
+# Closing the window doesn't stop the training.
+class LiveViewer:
+    def __init__(self, run_game_function, weight_size, speed=1, fps=None):
+        context = multiprocessing.get_context("spawn")
+        self.weight_size = weight_size
+        self.weights = context.RawArray("d", dimension(weight_size))
+        # version, stop
+        self.state = context.RawArray("q", 2)
+        self.score = context.RawValue("d", float("nan"))
+        self.process = context.Process(target=_show, args=(run_game_function, weight_size, self.weights, self.state, self.score, speed, fps), daemon=True)
+        self.process.start()
+
+    def show(self, weights, score=None):
+        state = self.state
+        state[0] += 1
+        self.weights[:] = flatten(weights)
+        self.score.value = float("nan") if score is None else score
+        state[0] += 1
+
+    def close(self, timeout=1.0):
+        self.state[1] = 1
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+# Weights and score of the last show(), with their version
+def _latest(weights, state, score):
+    while True:
+        version = state[0]
+        if version % 2 == 0:
+            values = weights[:]
+            value = score.value
+            if state[0] == version:
+                return version, values, value
+
+
+# Ends the game being drawn when new weights come (or on close)
+class _LiveGameViewer(Viewer):
+    def __init__(self, state, speed):
+        super().__init__(speed)
+        self.state = state
+        self.version = 0
+        self.score = None
+
+    def show_status(self):
+        super().show_status()
+        pygame = self.display.pygame
+        if self.score == self.score:  # not nan
+            pygame.display.set_caption(f"{pygame.display.get_caption()[0]} - best {self.score:g}")
+
+    def handle_events(self, game, video=None):
+        if self.state[1] or self.state[0] != self.version:
+            game.end("new_weights")
+            return
+        super().handle_events(game, video)
+
+
+def _show(run_game_function, weight_size, weights, state, score, speed, fps):
+    viewer = _LiveGameViewer(state, speed)
+    while not state[1]:
+        if state[0] == 0:
+            time.sleep(0.05)
+            continue
+        viewer.version, values, viewer.score = _latest(weights, state, score)
+        best = unflatten(values, weight_size)
+        if isinstance(best, tuple):
+            run_game_function(*best, render=True, fps=fps, viewer=viewer)
+        else:
+            run_game_function(best, render=True, fps=fps, viewer=viewer)
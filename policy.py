@@ -0,0 +1,64 @@
+from operator import mul
+
+
+# Policies compiled once from their weights, called at each frame: policy(game).
+#
+# inputs(game, buffer) is given by the variant: it writes the inputs of the
+# frame in buffer (allocated once with the policy) and returns False when there
+# is no pipe ahead, in which case the bird doesn't jump.
+# The decision is a dot product of the weights and the features:
+# sum(map(mul, weights, features)) does the same additions in the same order
+# as the sum(w * i for w, i in zip(weights, inputs)) it replaces, so the scores
+# don't change. As with zip, extra weights or extra features are ignored.
+class LinearPolicy:
+    def __init__(self, weights, inputs, n_inputs):
+        self.weights = list(weights)
+        self.inputs = inputs
+        self.buffer = [0.0] * n_inputs
+
+    def __call__(self, game):
+        buffer = self.buffer
+        if not self.inputs(game, buffer):
+            return False
+        return sum(map(mul, self.weights, buffer)) < 0
+
+
+# The features are the inputs and their squares, interleaved
+# (x0, x0², x1, x1², ...) or appended (x0, x1, ..., x0², x1², ...).
+# Only the features that have a weight are computed.
+class QuadraticPolicy(LinearPolicy):
+    def __init__(self, weights, inputs, n_inputs, interleaved=False):
+        super().__init__(weights, inputs, n_inputs)
+        if interleaved:
+            layout = [(i, squared) for i in range(n_inputs) for squared in (False, True)]
+        else:
+            layout = [(i, squared) for squared in (False, True) for i in range(n_inputs)]
+        layout = layout[:len(self.weights)]
+
+        self.features = [0.0] * len(layout)
+        self.plain = [(k, i) for k, (i, squared) in enumerate(layout) if not squared]
+        self.squared = [(k, i) for k, (i, squared) in enumerate(layout) if squared]
+
+    def __call__(self, game):
+        buffer = self.buffer
+        if not self.inputs(game, buffer):
+            return False
+        features = self.features
+        for k, i in self.plain:
+            features[k] = buffer[i]
+        for k, i in self.squared:
+            features[k] = buffer[i] ** 2
+        return sum(map(mul, self.weights, features)) < 0
+
+
+# Two decisions (jump, use power-up) from the same inputs
+class DualHeadPolicy(LinearPolicy):
+    def __init__(self, weights_jump, weights_powerup, inputs, n_inputs):
+        super().__init__(weights_jump, inputs, n_inputs)
+        self.weights_powerup = list(weights_powerup)
+
+    def __call__(self, game):
+        buffer = self.buffer
+        if not self.inputs(game, buffer):
+            return False, False
+        return sum(map(mul, self.weights, buffer)) < 0, sum(map(mul, self.weights_powerup, buffer)) < 0
@@ -0,0 +1,124 @@
+import time
+import tracemalloc
+
+PHASES = ("spawn", "policy", "physics", "recycling", "collision", "render")
+
+
+# Wall time and number of calls of each phase of the frames, accumulated over
+# the games it is attached to:
+#
+#   profiler = Profiler()
+#   info = {}
+#   jeuClassique.run_game(weights, seed=1, profiler=profiler, info=info)
+#   info["phases"]  # same as profiler.report()
+#
+# The phases of Game.step are wrapped on the game object only while it runs
+# with the profiler: a game played without one runs no timing code.
+# trace_allocations: also measures with tracemalloc the memory allocated by
+# each phase (much slower). tracemalloc doesn't count the allocations, so the
+# measures are in bytes: "allocated" adds up the peak reached above the memory
+# in use at the start of each call, "retained" what is still in use at the end.
+class Profiler:
+    def __init__(self, trace_allocations=False):
+        self.trace_allocations = trace_allocations
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.calls = dict.fromkeys(PHASES, 0)
+        self.allocated = dict.fromkeys(PHASES, 0)
+        self.retained = dict.fromkeys(PHASES, 0)
+        self.started_tracing = False
+
+    def wrap(self, phase, function):
+        perf_counter = time.perf_counter
+        seconds = self.seconds
+        calls = self.calls
+
+        if not self.trace_allocations:
+            def timed(*args):
+                start = perf_counter()
+                result = function(*args)
+                seconds[phase] += perf_counter() - start
+                calls[phase] += 1
+                return result
+            timed.wrapped = function
+            return timed
+
+        allocated = self.allocated
+        retained = self.retained
+        get_traced_memory = tracemalloc.get_traced_memory
+        reset_peak = tracemalloc.reset_peak
+        bias = self.memory_bias()
+
+        def traced(*args):
+            start = perf_counter()
+            before, _ = get_traced_memory()
+            reset_peak()
+            result = function(*args)
+            after, peak = get_traced_memory()
+            seconds[phase] += perf_counter() - start
+            calls[phase] += 1
+            allocated[phase] += peak - before - bias
+            retained[phase] += after - before - bias
+            return result
+        traced.wrapped = function
+        return traced
+
+    # Memory of the first reading itself (the ints it returns), seen by the second one
+    def memory_bias(self):
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        after, _ = tracemalloc.get_traced_memory()
+        if not tracing:
+            tracemalloc.stop()
+        return after - before
+
+    # Called by Game.run before the first frame
+    def attach(self, game):
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+        game.spawn = self.wrap("spawn", game.spawn)
+        if game.policy is not None:
+            game.policy = self.wrap("policy", game.policy)
+        game.physics = self.wrap("physics", game.physics)
+        game.recycle = self.wrap("recycling", game.recycle)
+        game.collide = self.wrap("collision", game.collide)
+
+    # Called by Game.run after the last frame, puts the game back as it was
+    def detach(self, game):
+        del game.spawn, game.physics, game.recycle, game.collide
+        if game.policy is not None:
+            game.policy = game.policy.wrapped
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    # {phase: {"seconds", "calls", "us_per_call", "share"}} for the phases
+    # called at least once, share: fraction of the time of all the phases
+    def report(self):
+        total = sum(self.seconds.values())
+        phases = {}
+        for phase in PHASES:
+            calls = self.calls[phase]
+            if calls == 0:
+                continue
+            seconds = self.seconds[phase]
+            phases[phase] = {
+                "seconds": seconds,
+                "calls": calls,
+                "us_per_call": seconds / calls * 1e6,
+                "share": seconds / total if total else 0.0,
+            }
+            if self.trace_allocations:
+                phases[phase]["allocated_bytes"] = self.allocated[phase]
+                phases[phase]["retained_bytes"] = self.retained[phase]
+        return phases
+
+    def print_report(self):
+        for phase, r in self.report().items():
+            line = f"{phase:10} {r['calls']:9} calls {r['seconds'] * 1000:10.2f} ms {r['us_per_call']:8.2f} us/call {r['share']:6.1%}"
+            if self.trace_allocations:
+                line += f"  allocated {r['allocated_bytes'] / 1024:9.1f} kB  retained {r['retained_bytes'] / 1024:8.1f} kB"
+            print(line)
@@ -0,0 +1,142 @@
+import json
+import os
+import random
+import struct
+import sys
+import zlib
+
+from game import Game, Viewer, game_constants
+
+MAGIC = b"FBRP"
+VERSION = 1
+
+
+# A replay holds everything needed to play a game again: the variant, its
+# constants, the seed and one bit per decision and per frame (jump, and
+# use power-up for jeuPowerUP). A 30 000 frames game is a few kB.
+#
+# Recording: run_game(..., replay=Replay()) then replay.save(path)
+# Playing back: play(Replay.load(path), render=True, fps=240)
+class Replay:
+    def __init__(self):
+        self.variant = None
+        self.constants = {}
+        self.seed = None
+        self.max_frames = None
+        self.steady_pipes = None
+        self.decisions_per_frame = 1
+        self.n_frames = 0
+        self.score = None
+        self.bits = bytearray()
+
+    # Called by run_game* before the game starts, returns the seed to use
+    def start(self, run_game_function, seed, max_frames, steady_pipes, decisions_per_frame=1):
+        if seed is None:
+            seed = random.getrandbits(63)
+        elif not isinstance(seed, int):
+            raise ValueError("only games seeded with an int can be recorded")
+
+        module = sys.modules[run_game_function.__module__]
+        self.variant = f"{run_game_function.__module__}.{run_game_function.__name__}"
+        self.constants = game_constants(module)
+        self.seed = seed
+        self.max_frames = max_frames
+        self.steady_pipes = steady_pipes
+        self.decisions_per_frame = decisions_per_frame
+        self.n_frames = 0
+        self.score = None
+        self.bits = bytearray()
+        return seed
+
+    # Called by run_game* at each frame with the decisions taken
+    def record(self, *decisions):
+        for k, decision in enumerate(decisions):
+            i = self.n_frames * self.decisions_per_frame + k
+            if i // 8 == len(self.bits):
+                self.bits.append(0)
+            if decision:
+                self.bits[i // 8] |= 1 << (i % 8)
+        self.n_frames += 1
+
+    def finish(self, score):
+        self.score = score
+
+    def _bit(self, i):
+        return bool(self.bits[i // 8] >> (i % 8) & 1)
+
+    # Decisions of each frame: a bool, or a (jump, use_powerup) tuple
+    def decisions(self):
+        n = self.decisions_per_frame
+        for frame in range(self.n_frames):
+            if n == 1:
+                yield self._bit(frame)
+            else:
+                yield tuple(self._bit(frame * n + k) for k in range(n))
+
+    def to_bytes(self):
+        header = json.dumps({
+            "variant": self.variant,
+            "constants": self.constants,
+            "seed": self.seed,
+            "max_frames": self.max_frames,
+            "steady_pipes": self.steady_pipes,
+            "decisions_per_frame": self.decisions_per_frame,
+            "n_frames": self.n_frames,
+            "score": self.score,
+        }).encode()
+        return MAGIC + struct.pack("<BI", VERSION, len(header)) + header + zlib.compress(bytes(self.bits), 9)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:4] != MAGIC:
+            raise ValueError("not a replay file")
+        version, header_size = struct.unpack_from("<BI", data, 4)
+        if version != VERSION:
+            raise ValueError(f"unsupported replay version {version}")
+        start = 4 + struct.calcsize("<BI")
+        header = json.loads(data[start:start + header_size])
+
+        replay = cls()
+        for name, value in header.items():
+            setattr(replay, name, value)
+        replay.bits = bytearray(zlib.decompress(data[start + header_size:]))
+        return replay
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+# Plays the game of a replay again, with the constants it was recorded with.
+# fps=0 plays as fast as possible, viewer: game.Viewer. Returns the score.
+def play(replay, render=False, fps=None, video_path=None, viewer=None):
+    game = Game(replay.constants, seed=replay.seed, max_frames=replay.max_frames, steady_pipes=replay.steady_pipes)
+    score = game.run(render=render, fps=fps, video_path=video_path, decisions=replay.decisions(), viewer=viewer)
+
+    if replay.score is not None and score != replay.score:
+        raise RuntimeError(f"replay diverged: score {score} instead of {replay.score}")
+    return score
+
+
+# Renders a replay to a video file as fast as possible, without a window
+def to_video(replay, path):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    return play(replay, render=True, fps=0, video_path=path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python replay.py game.replay [video.mp4]")
+        sys.exit(1)
+
+    replay = Replay.load(sys.argv[1])
+    if len(sys.argv) > 2:
+        score = to_video(replay, sys.argv[2])
+    else:
+        score = play(replay, viewer=Viewer())
+    print("Score final :", score)
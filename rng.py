@@ -0,0 +1,29 @@
+import random
+
+
+# random.Random interface (the methods used by the games) on top of a NumPy
+# Generator, so that a game can be driven by either of them
+class NumpyRandom:
+    def __init__(self, generator):
+        self.generator = generator
+
+    def randint(self, a, b):
+        return int(self.generator.integers(a, b + 1))
+
+    def uniform(self, a, b):
+        return float(self.generator.uniform(a, b))
+
+    def random(self):
+        return float(self.generator.random())
+
+
+# seed can be None (global random module, as before), an int/str seed,
+# a random.Random or a numpy.random.Generator
+def make_rng(seed=None):
+    if seed is None:
+        return random
+    if isinstance(seed, (random.Random, NumpyRandom)):
+        return seed
+    if hasattr(seed, "integers") and hasattr(seed, "bit_generator"):
+        return NumpyRandom(seed)
+    return random.Random(seed)
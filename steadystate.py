@@ -0,0 +1,22 @@
+# Once PIPE_GAP and PIPE_SPEED have reached their limits the difficulty doesn't
+# change anymore: the game is stationary. A policy that survives `pipes` pipes in
+# this regime will most likely reach the frame cap, so the game can be stopped
+# and its score extrapolated from the rate observed since the regime started.
+class SteadyStateDetector:
+    def __init__(self, pipes):
+        self.pipes = pipes
+        self.start = None
+
+    # Called once per frame, returns True when the game can be stopped
+    def update(self, frozen, pipe_count, score, alive_distance):
+        if self.start is None:
+            if frozen:
+                self.start = (pipe_count, score, alive_distance)
+            return False
+        return pipe_count - self.start[0] >= self.pipes
+
+    # Score at the end of the game if it keeps going at the same rate
+    def extrapolate(self, score, alive_distance, final_alive_distance):
+        _, start_score, start_distance = self.start
+        rate = (score - start_score) / (alive_distance - start_distance)
+        return score + round(rate * (final_alive_distance - alive_distance))
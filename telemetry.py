@@ -0,0 +1,185 @@
+import csv
+import io
+import json
+import math
+import os
+import time
+
+import numpy as np
+
+# Telemetry of a training: one record per generation.
+#
+#   telemetry = Telemetry("run.ndjson")
+#   hill_climb(run_game, 5, generations=50000, telemetry=telemetry)
+#   history = read("run.ndjson")  # at any time, even while the training runs
+#   plot(history, "jeuClassique")
+#
+# The rolling statistics are kept in fixed-size buffers: the moving average of
+# the last window scores is a running sum, updated in O(1) whatever the length
+# of the training, and the best score is the highest one recorded.
+# The records are written to the file (JSON lines, or CSV if the path ends in
+# .csv) every flush_every generations and at each flush(), not one by one.
+# The console gets a line at most every print_interval seconds, with the last
+# generation: printing 50 000 lines slows a notebook down more than the games.
+# A NaN score (a candidate stopped by racing) is written but left out of the
+# moving average and of the best score.
+
+
+class Telemetry:
+    def __init__(self, path=None, window=100, print_interval=1.0, flush_every=500):
+        self.path = path
+        self.csv = path is not None and path.endswith(".csv")
+        self.print_interval = print_interval
+        self.flush_every = flush_every
+        self.window = np.zeros(window)
+        self.count = 0
+        self.total = 0.0
+        self.best = -np.inf
+        self.pending = []
+        self.written = False
+        self.next_print = 0.0
+        self.last = None
+        if path is not None and os.path.exists(path):
+            self._drop_torn_line()
+
+    # A crash while writing may have left half a line at the end of the file
+    def _drop_torn_line(self):
+        with open(self.path, "rb+") as f:
+            size = f.seek(0, os.SEEK_END)
+            end = size
+            while end > 0:
+                start = max(0, end - 4096)
+                f.seek(start)
+                chunk = f.read(end - start)
+                newline = chunk.rfind(b"\n")
+                if newline >= 0:
+                    end = start + newline + 1
+                    break
+                end = start
+            if end < size:
+                f.truncate(end)
+            self.written = end > 0
+
+    def moving_average(self):
+        if self.count == 0:
+            return math.nan
+        return self.total / min(self.count, len(self.window))
+
+    # Adds the score of a generation, returns the moving average.
+    # fields: the other values to write with it (epsilon, best...)
+    def record(self, generation, score, **fields):
+        if score == score:  # not NaN
+            i = self.count % len(self.window)
+            self.total += score - float(self.window[i])
+            self.window[i] = score
+            self.count += 1
+            if score > self.best:
+                self.best = score
+        moving_avg = self.moving_average()
+
+        if self.path is not None:
+            self.pending.append({"generation": generation, "score": score, "moving_avg": moving_avg, **fields})
+            if len(self.pending) >= self.flush_every:
+                self.flush()
+
+        # the line is only formatted when it is printed
+        self.last = (generation, score, moving_avg, fields)
+        now = time.monotonic()
+        if now >= self.next_print:
+            self.next_print = now + self.print_interval
+            self.print_last()
+        return moving_avg
+
+    def print_last(self):
+        generation, score, moving_avg, fields = self.last
+        print(f"Generation {generation} | Score: {score:.2f} | Moving avg: {moving_avg:.2f}" + "".join(
+            f" | {name}: {value:.4g}" if isinstance(value, float) else f" | {name}: {value}" for name, value in fields.items()))
+        self.last = None
+
+    def flush(self):
+        if not self.pending:
+            return
+        if self.csv:
+            out = io.StringIO()
+            writer = csv.DictWriter(out, fieldnames=list(self.pending[0]), lineterminator="\n")
+            if not self.written:
+                writer.writeheader()
+            writer.writerows(self.pending)
+            text = out.getvalue()
+        else:
+            text = "".join(json.dumps(record) + "\n" for record in self.pending)
+        with open(self.path, "a") as f:
+            f.write(text)
+        self.written = True
+        self.pending = []
+
+    # Writes what is left and prints the last generation if it was not shown
+    def close(self):
+        self.flush()
+        if self.last is not None:
+            self.print_last()
+
+    # For the checkpoints of the training: the moving average goes on exactly
+    # as if the training had not been stopped
+    def state(self):
+        return {"window": self.window.tolist(), "count": self.count, "total": self.total, "best": self.best}
+
+    def restore(self, state):
+        self.window[:] = state["window"]
+        self.count = state["count"]
+        self.total = state["total"]
+        self.best = state["best"]
+
+
+# {column: list of values} from a telemetry file. A training resumed from a
+# checkpoint writes again the generations played after it: the last record of
+# each generation is kept.
+def read(path):
+    with open(path, newline="") as f:
+        if path.endswith(".csv"):
+            records = [{name: float(value) if value else None for name, value in row.items()} for row in csv.DictReader(f)]
+        else:
+            records = []
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+
+    by_generation = {}
+    for record in records:
+        by_generation[int(record["generation"])] = record
+    columns = {}
+    for generation in sorted(by_generation):
+        for name, value in by_generation[generation].items():
+            columns.setdefault(name, []).append(value)
+    return columns
+
+
+# Scores, moving average and epsilon of a training, from read() or from the
+# history returned by a trainer
+def plot(history, title=None):
+    import matplotlib.pyplot as plt
+
+    if isinstance(history, str):
+        history = read(history)
+    scores = history.get("score", history.get("scores"))
+    epsilons = history.get("epsilon", history.get("epsilons"))
+
+    fig, ax1 = plt.subplots()
+    ax1.set_xlabel("Generations")
+    ax1.set_ylabel("Score", color='tab:blue')
+    ax1.plot(scores, label="Scores", color='tab:blue', alpha=0.5)
+    ax1.plot(history["moving_avg"], label="Moving average", color='tab:red', linestyle='dashed')
+    ax1.tick_params(axis='y', labelcolor='tab:blue')
+
+    if epsilons:
+        ax2 = ax1.twinx()
+        ax2.set_ylabel("ε (Epsilon)", color='tab:green')
+        ax2.plot(epsilons, label="Epsilon", color='tab:green', linestyle='dotted')
+        ax2.tick_params(axis='y', labelcolor='tab:green')
+
+    fig.tight_layout()
+    plt.title(title)
+    fig.legend(loc="upper right", bbox_to_anchor=(1, 1), bbox_transform=ax1.transAxes)
+    plt.show()
@@ -0,0 +1,473 @@
+import math
+import random
+from bisect import insort
+
+import numpy as np
+
+from cache import variant_name
+from checkpoint import Checkpoint
+from evaluation import SerialEvaluator
+from telemetry import Telemetry
+
+# Trainers of the weights of the policies.
+#
+# The weights are a list of floats, or for run_game_powerUP a tuple of two
+# lists (jump, power-up): weight_size is then a tuple of two sizes, (7, 7).
+# The fitness of a candidate is an objective computed from the scores of its
+# games (batch_size or games games): mean_score, average_of_worst or
+# ConsistencyScore(k).
+# The games are played by an evaluator (evaluation.Evaluator for a pool of
+# processes), one after the other in the calling process if there is none.
+# common_seeds: the candidates compared in a generation are played on the same
+# courses, drawn for each generation (common random numbers): a candidate is
+# not kept because it was lucky with its pipes, the comparison only sees the
+# difference of the weights.
+# telemetry: a telemetry.Telemetry that gets the score of each generation, to
+# write them to a file. Without one, the progress is still printed, at most
+# once a second.
+# viewer: a liveview.LiveViewer, given each new best weights.
+
+
+# Statistics of the scores of a batch, updated game by game: count, mean and
+# variance (Welford), and the n_worst lowest scores.
+class RunningScores:
+    def __init__(self, n_worst=5):
+        self.n_worst = n_worst
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.worst = []
+
+    def add(self, score):
+        self.count += 1
+        delta = score - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (score - self.mean)
+        if len(self.worst) < self.n_worst or score < self.worst[-1]:
+            insort(self.worst, score)
+            del self.worst[self.n_worst:]
+
+    # population standard deviation, as over the whole batch
+    def std_dev(self):
+        return math.sqrt(self.m2 / self.count)
+
+    def average_of_worst(self):
+        return sum(self.worst) / len(self.worst)
+
+
+# The objectives are computed from a RunningScores. objective(scores) gives the
+# fitness of a whole batch. upper_bound(running, games) is the highest fitness
+# the batch can still reach once its games are all played, None if nothing
+# can be said yet: the racing stops a candidate when it is below the fitness
+# to beat.
+class Objective:
+    n_worst = 1
+
+    def __call__(self, scores):
+        running = RunningScores(self.n_worst)
+        for score in scores:
+            running.add(score)
+        return self.value(running)
+
+
+# Average of the scores. Without max_score (the highest score of a game) the
+# average can always be saved by the games left.
+class MeanScore(Objective):
+    def __init__(self, max_score=None):
+        self.max_score = max_score
+
+    def value(self, running):
+        return running.mean
+
+    def upper_bound(self, running, games):
+        if self.max_score is None:
+            return None
+        return (running.mean * running.count + self.max_score * (games - running.count)) / games
+
+
+# Average of the n worst scores of the batch. Once n games are played, more
+# games can only lower it.
+class AverageOfWorst(Objective):
+    def __init__(self, n=5):
+        self.n_worst = n
+
+    def value(self, running):
+        return running.average_of_worst()
+
+    def upper_bound(self, running, games):
+        if running.count < min(self.n_worst, games):
+            return None
+        return running.average_of_worst()
+
+
+# Average of the n worst scores, minus k standard deviations of the batch.
+# The standard deviation of the whole batch is at least sqrt(m2 / games), when
+# all the games left score the current mean.
+class ConsistencyScore(AverageOfWorst):
+    def __init__(self, k=1.0, n=5):
+        super().__init__(n)
+        self.k = k
+
+    def value(self, running):
+        return running.average_of_worst() - self.k * running.std_dev()
+
+    def upper_bound(self, running, games):
+        bound = super().upper_bound(running, games)
+        if bound is None:
+            return None
+        return bound - self.k * math.sqrt(running.m2 / games)
+
+
+mean_score = MeanScore()
+average_of_worst = AverageOfWorst(5)
+
+
+def random_weights(weight_size, low, high, rng):
+    if isinstance(weight_size, tuple):
+        return tuple([rng.uniform(low, high) for _ in range(n)] for n in weight_size)
+    return [rng.uniform(low, high) for _ in range(weight_size)]
+
+
+def mutate(weights, step, rng):
+    if isinstance(weights, tuple):
+        return tuple([w + rng.uniform(-step, step) for w in ws] for ws in weights)
+    return [w + rng.uniform(-step, step) for w in weights]
+
+
+def dimension(weight_size):
+    return sum(weight_size) if isinstance(weight_size, tuple) else weight_size
+
+
+# Vector of a population-based strategy -> weights given to run_game
+def unflatten(vector, weight_size):
+    if not isinstance(weight_size, tuple):
+        return [float(x) for x in vector]
+    weights = []
+    start = 0
+    for n in weight_size:
+        weights.append([float(x) for x in vector[start:start + n]])
+        start += n
+    return tuple(weights)
+
+
+def flatten(weights):
+    if isinstance(weights, tuple):
+        return [w for ws in weights for w in ws]
+    return list(weights)
+
+
+# Seeds of the courses shared by the candidates of a generation
+def course_seeds(rng, n):
+    return [rng.getrandbits(64) for _ in range(n)]
+
+
+# Scores of each candidate, batch_size games per candidate. seeds: the
+# batch_size courses played by every candidate (None: random courses)
+def play_batches(evaluator, run_game_function, candidates, batch_size, max_frames=None, seeds=None):
+    weights_list = [weights for weights in candidates for _ in range(batch_size)]
+    if seeds is not None:
+        seeds = seeds * len(candidates)
+    scores = evaluator.evaluate(run_game_function, weights_list, seeds=seeds, max_frames=max_frames)
+    return [scores[i * batch_size:(i + 1) * batch_size] for i in range(len(candidates))]
+
+
+# Racing: plays the games of one candidate by rounds of step games (the
+# workers of the evaluator) and stops as soon as the objective shows that its
+# fitness over all the games can't be above threshold.
+# Returns the fitness on the games played and the number of games played.
+def race(evaluator, run_game_function, weights, games, objective, threshold, seeds=None, step=None, max_frames=None):
+    step = step or evaluator.max_workers
+    if seeds is None:
+        seeds = [None] * games
+    running = RunningScores(objective.n_worst)
+
+    while running.count < games:
+        # the first round gives the bound something to work with
+        n = max(step, objective.n_worst) if running.count == 0 else step
+        n = min(n, games - running.count)
+        start = running.count
+        for score in evaluator.evaluate(run_game_function, [weights] * n, seeds=seeds[start:start + n], max_frames=max_frames):
+            running.add(score)
+
+        bound = objective.upper_bound(running, games)
+        if bound is not None and bound <= threshold:
+            break
+
+    return objective.value(running), running.count
+
+
+# (1+1) hill climber of the notebook, with epsilon-greedy exploration: at each
+# generation the candidate is either new random weights (probability epsilon)
+# or the best weights moved by at most ±0.2, and it replaces the best weights
+# if its fitness is higher.
+# With common_seeds, the best weights are played again with the candidate, on
+# its courses, and the two fitnesses compared are those of this generation.
+# With racing, the games of the candidate are stopped as soon as it can't beat
+# the best weights (see race). The fitness of a stopped candidate is only the
+# one of the games played (above the full one for the average of the worst):
+# its score is NaN, left out of the moving average, and the partial fitness
+# goes to partial_scores (NaN for the others).
+# The courses are drawn from the random generator of the training: with a
+# seed, the same training can be played again.
+# checkpoint: path of a checkpoint.Checkpoint file written every
+# checkpoint_every generations. If it already holds a checkpoint of the same
+# training, the training goes on from there, exactly as if it had never been
+# stopped, up to generations.
+# Returns best_weights, best_score and the history of the training
+# (scores, moving_avg over the window of the telemetry, epsilons, games played,
+# partial_scores).
+def hill_climb(run_game_function, weight_size, generations=1000, epsilon=0, epsilon_decay=1, batch_size=1, objective=mean_score,
+               evaluator=None, max_frames=None, seed=None, common_seeds=False, racing=False, checkpoint=None, checkpoint_every=100,
+               telemetry=None, viewer=None):
+    rng = random.Random(seed)
+    evaluator = evaluator or SerialEvaluator()
+    telemetry = telemetry or Telemetry()
+
+    epsilon_min = 0
+    history = {"scores": [], "moving_avg": [], "epsilons": [], "games": [], "partial_scores": []}
+    scores = history["scores"]
+
+    if checkpoint is not None:
+        checkpoint = Checkpoint(checkpoint, {
+            "run_game_function": variant_name(run_game_function), "weight_size": weight_size, "epsilon": epsilon,
+            "epsilon_decay": epsilon_decay, "batch_size": batch_size, "objective": [type(objective).__name__, vars(objective)],
+            "max_frames": max_frames, "seed": seed, "common_seeds": common_seeds, "racing": racing,
+        })
+    saved = checkpoint.load() if checkpoint is not None else None
+
+    if saved is None:
+        start = 0
+        best_weights = random_weights(weight_size, -1, 1, rng)
+        seeds = course_seeds(rng, batch_size)
+        best_score = objective(play_batches(evaluator, run_game_function, [best_weights], batch_size, max_frames, seeds)[0])
+    else:
+        start, state, saved_history = saved
+        best_weights = tuple(state["best_weights"]) if isinstance(weight_size, tuple) else state["best_weights"]
+        best_score = state["best_score"]
+        epsilon = state["epsilon"]
+        version, internal_state, gauss_next = state["rng"]
+        rng.setstate((version, tuple(internal_state), gauss_next))
+        for name in history:
+            history[name].extend(saved_history[name])
+        telemetry.restore(state["telemetry"])
+        print(f"Resuming from generation {start} | Best score: {best_score}")
+    last_checkpoint = start
+    if viewer is not None:
+        viewer.show(best_weights, best_score)
+
+    for gen in range(start, generations):
+        history["epsilons"].append(epsilon)
+
+        # Exploration or exploitation
+        if rng.random() < epsilon:
+            weights = random_weights(weight_size, -2, 2, rng)
+        else:
+            weights = mutate(best_weights, 0.2, rng)
+
+        seeds = course_seeds(rng, batch_size)
+        games = batch_size
+        stopped = False
+        if common_seeds and not racing:
+            batches = play_batches(evaluator, run_game_function, [weights, best_weights], batch_size, max_frames, seeds)
+            score, best_score = objective(batches[0]), objective(batches[1])
+            games += batch_size
+        else:
+            if common_seeds:
+                # the best weights first: their fitness is the one to beat
+                best_score = objective(play_batches(evaluator, run_game_function, [best_weights], batch_size, max_frames, seeds)[0])
+                games += batch_size
+            if racing:
+                score, played = race(evaluator, run_game_function, weights, batch_size, objective, best_score, seeds, max_frames=max_frames)
+                games += played - batch_size
+                stopped = played < batch_size
+            else:
+                score = objective(play_batches(evaluator, run_game_function, [weights], batch_size, max_frames, seeds)[0])
+
+        if score > best_score:
+            best_score = score
+            best_weights = weights
+            if viewer is not None:
+                viewer.show(best_weights, best_score)
+
+        complete_score = math.nan if stopped else score
+        scores.append(complete_score)
+        history["partial_scores"].append(score if stopped else math.nan)
+        history["moving_avg"].append(telemetry.record(gen, complete_score, epsilon=epsilon, best=best_score, games=games))
+        history["games"].append(games)
+
+        epsilon = max(epsilon_min, epsilon * epsilon_decay)
+
+        if checkpoint is not None and (gen + 1 - last_checkpoint >= checkpoint_every or gen + 1 == generations):
+            telemetry.flush()
+            state = {"best_weights": best_weights, "best_score": best_score, "epsilon": epsilon, "rng": rng.getstate(),
+                     "telemetry": telemetry.state()}
+            checkpoint.save(gen + 1, state, {name: values[last_checkpoint:] for name, values in history.items()})
+            last_checkpoint = gen + 1
+
+    telemetry.close()
+    return best_weights, best_score, history
+
+
+# (μ, λ) evolution strategy with self-adapted step sizes: each generation,
+# lam children are drawn around parents taken at random among the mu best
+# children of the previous generation (the parents themselves are dropped).
+# Each individual carries its own sigma, mutated log-normally before the
+# weights, so the step size follows what works.
+class MuLambdaES:
+    def __init__(self, weight_size, mu=5, lam=20, sigma=0.3, seed=None):
+        self.weight_size = weight_size
+        self.n = dimension(weight_size)
+        self.mu = mu
+        self.lam = lam
+        self.rng = np.random.default_rng(seed)
+        self.tau = 1 / math.sqrt(2 * self.n)
+        self.parents = self.rng.uniform(-1, 1, (mu, self.n))
+        self.parent_sigmas = np.full(mu, float(sigma))
+        self.children = None
+        self.child_sigmas = None
+        self.mean = self.parents.mean(axis=0)
+
+    @property
+    def sigma(self):
+        return float(self.parent_sigmas.mean())
+
+    # lam candidates, to be scored and given back to tell() in the same order
+    def ask(self):
+        picks = self.rng.integers(0, self.mu, self.lam)
+        self.child_sigmas = self.parent_sigmas[picks] * np.exp(self.tau * self.rng.standard_normal(self.lam))
+        self.children = self.parents[picks] + self.child_sigmas[:, None] * self.rng.standard_normal((self.lam, self.n))
+        return [unflatten(child, self.weight_size) for child in self.children]
+
+    # fitnesses: higher is better
+    def tell(self, fitnesses):
+        best = np.argsort(-np.asarray(fitnesses, dtype=float), kind="stable")[:self.mu]
+        self.parents = self.children[best]
+        self.parent_sigmas = self.child_sigmas[best]
+        self.mean = self.parents.mean(axis=0)
+
+    def best_guess(self):
+        return unflatten(self.mean, self.weight_size)
+
+
+# CMA-ES (Hansen, "The CMA Evolution Strategy: A Tutorial"): the candidates
+# are drawn from a normal distribution whose mean, step size and covariance
+# are adapted from the best half of each generation. The covariance learns
+# the correlations between the weights (the 2 heads of jeuPowerUP, x and x²
+# in the quadratic variants...).
+class CMAES:
+    def __init__(self, weight_size, sigma=0.5, population=None, mean=None, seed=None):
+        self.weight_size = weight_size
+        n = self.n = dimension(weight_size)
+        self.rng = np.random.default_rng(seed)
+        self.lam = population or 4 + int(3 * math.log(n))
+        self.mu = self.lam // 2
+
+        recombination = math.log(self.mu + 0.5) - np.log(np.arange(1, self.mu + 1))
+        self.recombination = recombination / recombination.sum()
+        self.mueff = 1 / (self.recombination ** 2).sum()
+
+        mueff = self.mueff
+        self.cc = (4 + mueff / n) / (n + 4 + 2 * mueff / n)
+        self.cs = (mueff + 2) / (n + mueff + 5)
+        self.c1 = 2 / ((n + 1.3) ** 2 + mueff)
+        self.cmu = min(1 - self.c1, 2 * (mueff - 2 + 1 / mueff) / ((n + 2) ** 2 + mueff))
+        self.damps = 1 + 2 * max(0, math.sqrt((mueff - 1) / (n + 1)) - 1) + self.cs
+        self.chi_n = math.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n ** 2))
+
+        self.mean = np.zeros(n) if mean is None else np.array(flatten(mean), dtype=float)
+        self.sigma = sigma
+        self.pc = np.zeros(n)
+        self.ps = np.zeros(n)
+        self.B = np.eye(n)
+        self.D = np.ones(n)
+        self.C = np.eye(n)
+        self.invsqrt_C = np.eye(n)
+        self.generation = 0
+        self.evaluations = 0
+        self.eigen_evaluations = 0
+        self.population = None
+
+    def ask(self):
+        z = self.rng.standard_normal((self.lam, self.n))
+        self.population = self.mean + self.sigma * (z * self.D) @ self.B.T
+        return [unflatten(x, self.weight_size) for x in self.population]
+
+    # fitnesses: higher is better
+    def tell(self, fitnesses):
+        n = self.n
+        self.generation += 1
+        self.evaluations += self.lam
+        order = np.argsort(-np.asarray(fitnesses, dtype=float), kind="stable")
+        selected = self.population[order[:self.mu]]
+
+        old_mean = self.mean
+        self.mean = self.recombination @ selected
+        y = (self.mean - old_mean) / self.sigma
+
+        self.ps = (1 - self.cs) * self.ps + math.sqrt(self.cs * (2 - self.cs) * self.mueff) * self.invsqrt_C @ y
+        ps_norm = np.linalg.norm(self.ps)
+        hsig = ps_norm / math.sqrt(1 - (1 - self.cs) ** (2 * self.generation)) / self.chi_n < 1.4 + 2 / (n + 1)
+        self.pc = (1 - self.cc) * self.pc + hsig * math.sqrt(self.cc * (2 - self.cc) * self.mueff) * y
+
+        steps = (selected - old_mean) / self.sigma
+        rank_one = np.outer(self.pc, self.pc) + (not hsig) * self.cc * (2 - self.cc) * self.C
+        rank_mu = steps.T @ (self.recombination[:, None] * steps)
+        self.C = (1 - self.c1 - self.cmu) * self.C + self.c1 * rank_one + self.cmu * rank_mu
+
+        self.sigma *= math.exp((self.cs / self.damps) * (ps_norm / self.chi_n - 1))
+
+        # the decomposition is O(n³), it is only updated every
+        # lam / (c1 + cmu) / n / 10 evaluations as in the tutorial: every
+        # generation for the number of weights of these games
+        if self.evaluations - self.eigen_evaluations > self.lam / (self.c1 + self.cmu) / n / 10:
+            self.eigen_evaluations = self.evaluations
+            self.C = np.triu(self.C) + np.triu(self.C, 1).T
+            eigenvalues, self.B = np.linalg.eigh(self.C)
+            self.D = np.sqrt(np.maximum(eigenvalues, 1e-20))
+            self.invsqrt_C = self.B @ np.diag(1 / self.D) @ self.B.T
+
+    def best_guess(self):
+        return unflatten(self.mean, self.weight_size)
+
+
+# Trains with a population-based strategy (MuLambdaES, CMAES): each
+# generation the whole population is played in one call to the evaluator,
+# games games per candidate.
+# Returns the best candidate seen, its fitness and the history of the training
+# (best and mean fitness, and sigma, of each generation). The mean of the
+# distribution, strategy.best_guess(), is often a better final choice than
+# a candidate that was lucky once.
+def evolve(run_game_function, strategy, generations=100, games=1, objective=mean_score, evaluator=None, max_frames=None,
+           common_seeds=False, seed=None, telemetry=None, viewer=None):
+    rng = random.Random(seed)
+    evaluator = evaluator or SerialEvaluator()
+    telemetry = telemetry or Telemetry()
+
+    best_weights = None
+    best_score = float('-inf')
+    history = {"best": [], "mean": [], "sigma": [], "evaluations": []}
+    evaluations = 0
+
+    for gen in range(generations):
+        candidates = strategy.ask()
+        seeds = course_seeds(rng, games) if common_seeds else None
+        fitnesses = [objective(scores) for scores in play_batches(evaluator, run_game_function, candidates, games, max_frames, seeds)]
+        strategy.tell(fitnesses)
+        evaluations += len(candidates) * games
+
+        generation_best = max(range(len(candidates)), key=fitnesses.__getitem__)
+        if fitnesses[generation_best] > best_score:
+            best_score = fitnesses[generation_best]
+            best_weights = candidates[generation_best]
+            if viewer is not None:
+                viewer.show(best_weights, best_score)
+
+        history["best"].append(fitnesses[generation_best])
+        history["mean"].append(sum(fitnesses) / len(fitnesses))
+        history["sigma"].append(strategy.sigma)
+        history["evaluations"].append(evaluations)
+        telemetry.record(gen, fitnesses[generation_best], mean=history["mean"][-1], sigma=float(strategy.sigma), best=best_score,
+                         evaluations=evaluations)
+
+    telemetry.close()
+    return best_weights, best_score, history